@@ -20,14 +20,16 @@ License: MIT
 import threading
 import time
 import json
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass, field, asdict
+from typing import DefaultDict, Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
 from pathlib import Path
-from collections import deque
+from collections import defaultdict, deque
+from operator import itemgetter
 import logging
 import hashlib
+import pickle
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -73,7 +75,29 @@ class Strategy:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
-        return asdict(self)
+        return {
+            'id': self.id,
+            'name': self.name,
+            'success_count': self.success_count,
+            'failure_count': self.failure_count,
+            'total_reward': self.total_reward,
+            'created_at': self.created_at,
+            'last_used': self.last_used,
+            'generation': self.generation,
+            'parent_id': self.parent_id
+        }
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """
+    Unpickler for strategy snapshots that refuses every global
+    
+    Snapshots hold only builtin dicts, strings and numbers, so a file that
+    references any class or callable is rejected instead of executed.
+    """
+    
+    def find_class(self, module: str, name: str):
+        raise pickle.UnpicklingError(f"Disallowed global in strategy snapshot: {module}.{name}")
 
 
 @dataclass
@@ -122,7 +146,7 @@ class EvolutionEngine:
         self.outcomes: deque = deque(maxlen=10000)
         
         # Genealogy tracking
-        self.genealogy: Dict[str, List[str]] = {}  # parent_id -> [child_ids]
+        self.genealogy: DefaultDict[str, List[str]] = defaultdict(list)  # parent_id -> [child_ids]
         
         # Current generation number
         self.current_generation = 1
@@ -130,6 +154,9 @@ class EvolutionEngine:
         # Lock for thread safety
         self._lock = threading.RLock()
         
+        # Whether in-memory state has changed since the last save
+        self._dirty = False
+        
         # Load strategies if they exist
         self._load_strategies()
         
@@ -159,8 +186,6 @@ class EvolutionEngine:
                 generation = parent.generation + 1
                 
                 # Track genealogy
-                if parent_id not in self.genealogy:
-                    self.genealogy[parent_id] = []
                 self.genealogy[parent_id].append(strategy_id)
             
             strategy = Strategy(
@@ -171,6 +196,7 @@ class EvolutionEngine:
             )
             
             self.strategies[strategy_id] = strategy
+            self._dirty = True
             
             logger.info(f"Created strategy '{name}' (ID: {strategy_id})")
             return strategy_id
@@ -206,6 +232,7 @@ class EvolutionEngine:
             
             strategy.total_reward += reward
             strategy.last_used = datetime.now().isoformat()
+            self._dirty = True
             
             # Record outcome
             outcome = Outcome(
@@ -216,10 +243,61 @@ class EvolutionEngine:
                 error=error
             )
             self.outcomes.appendleft(outcome)
+            strategy_name = strategy.name
+        
+        # Log outside the lock; lazy args are only formatted when emitted
+        if success:
+            logger.info("Strategy '%s': ✅ SUCCESS", strategy_name)
+        else:
+            logger.warning("Strategy '%s': ❌ FAILED", strategy_name)
+    
+    def record_outcomes_bulk(
+        self,
+        strategy_id: str,
+        results: List[Tuple[bool, float]]
+    ) -> None:
+        """
+        Record a batch of outcomes for one strategy under a single lock
+        
+        Args:
+            strategy_id: Strategy that was applied
+            results: (success, reward) pairs, oldest first
+        """
+        # Convert the whole batch before touching any state, so a malformed
+        # entry raises without leaving the strategy half-updated
+        results = [(bool(success), float(reward)) for success, reward in results]
+        successes = sum(1 for success, _ in results if success)
+        total_reward = sum(reward for _, reward in results)
+        
+        with self._lock:
+            if strategy_id not in self.strategies:
+                raise ValueError(f"Unknown strategy: {strategy_id}")
+            
+            if not results:
+                return
+            
+            strategy = self.strategies[strategy_id]
+            timestamp = datetime.now().isoformat()
+            
+            for success, reward in results:
+                self.outcomes.appendleft(Outcome(
+                    strategy_id=strategy_id,
+                    success=success,
+                    reward=reward,
+                    timestamp=timestamp
+                ))
             
-            # Log
-            log_fn = logger.info if success else logger.warning
-            log_fn(f"Strategy '{strategy.name}': {'✅ SUCCESS' if success else '❌ FAILED'}")
+            strategy.total_reward += total_reward
+            strategy.success_count += successes
+            strategy.failure_count += len(results) - successes
+            strategy.last_used = timestamp
+            self._dirty = True
+            strategy_name = strategy.name
+        
+        logger.info(
+            "Strategy '%s': recorded %d outcomes (%d succeeded)",
+            strategy_name, len(results), successes
+        )
     
     def get_best_strategy(self, generation: Optional[int] = None) -> Optional[str]:
         """
@@ -232,24 +310,27 @@ class EvolutionEngine:
             Strategy ID of best performer, or None
         """
         with self._lock:
-            candidates = []
+            best_id = None
+            best_key = None
             
+            # Rank by success rate, then by average reward; the math is
+            # inlined to avoid property dispatch per candidate
             for strategy in self.strategies.values():
                 if generation is not None and strategy.generation != generation:
                     continue
                 
-                candidates.append(strategy)
-            
-            if not candidates:
-                return None
-            
-            # Sort by success rate, then by average reward
-            best = max(
-                candidates,
-                key=lambda s: (s.success_rate, s.average_reward)
-            )
+                attempts = strategy.success_count + strategy.failure_count
+                if attempts:
+                    key = (strategy.success_count / attempts,
+                           strategy.total_reward / attempts)
+                else:
+                    key = (0.0, 0.0)
+                
+                if best_key is None or key > best_key:
+                    best_key = key
+                    best_id = strategy.id
             
-            return best.id if best else None
+            return best_id
     
     def get_winning_strategies(self) -> List[str]:
         """
@@ -259,17 +340,22 @@ class EvolutionEngine:
             List of winning strategy IDs
         """
         with self._lock:
-            winning = [
-                s.id for s in self.strategies.values()
-                if (s.success_rate >= self.success_threshold and
-                    s.total_attempts >= self.min_attempts)
-            ]
-            
-            return sorted(
-                winning,
-                key=lambda sid: self.strategies[sid].success_rate,
-                reverse=True
-            )
+            threshold = self.success_threshold
+            min_attempts = self.min_attempts
+            
+            # Single pass over the raw counters; each rate is computed once
+            # and reused as the sort key
+            winning = []
+            for s in self.strategies.values():
+                attempts = s.success_count + s.failure_count
+                if attempts < min_attempts:
+                    continue
+                rate = s.success_count / attempts if attempts else 0.0
+                if rate >= threshold:
+                    winning.append((rate, s.id))
+            
+            winning.sort(key=itemgetter(0), reverse=True)
+            return [sid for _, sid in winning]
     
     def apply_strategy(self, strategy_id: str) -> bool:
         """
@@ -287,6 +373,7 @@ class EvolutionEngine:
             
             strategy = self.strategies[strategy_id]
             strategy.last_used = datetime.now().isoformat()
+            self._dirty = True
             
             logger.info(f"Applied strategy: {strategy.name}")
             return True
@@ -321,11 +408,8 @@ class EvolutionEngine:
                 logger.info("No winning strategies to evolve")
                 return None
             
-            # Pick best winner
-            best_winner = max(
-                winning,
-                key=lambda sid: self.strategies[sid].success_rate
-            )
+            # Pick best winner (already sorted by success rate)
+            best_winner = winning[0]
             
             parent = self.strategies[best_winner]
             
@@ -412,11 +496,15 @@ class EvolutionEngine:
             return outcomes[:limit]
     
     def save_strategies(self):
-        """Save strategies to disk"""
+        """Save strategies to disk (no-op if nothing changed since last save)"""
         strategies_file = self.storage_path / "strategies.jsonl"
         genealogy_file = self.storage_path / "genealogy.json"
+        snapshot_file = self.storage_path / "strategies.pkl"
         
         with self._lock:
+            if not self._dirty:
+                return
+            
             try:
                 # Save strategies
                 with open(strategies_file, 'w') as f:
@@ -427,6 +515,17 @@ class EvolutionEngine:
                 with open(genealogy_file, 'w') as f:
                     json.dump(self.genealogy, f, indent=2)
                 
+                # Save binary snapshot for fast cold start (written last so
+                # it is never older than the JSONL it mirrors). It holds plain
+                # dicts so loading it never has to resolve a class.
+                with open(snapshot_file, 'wb') as f:
+                    pickle.dump(
+                        [strategy.to_dict() for strategy in self.strategies.values()],
+                        f,
+                        protocol=pickle.HIGHEST_PROTOCOL
+                    )
+                
+                self._dirty = False
                 logger.info(f"Saved {len(self.strategies)} strategies")
             
             except Exception as e:
@@ -442,6 +541,9 @@ class EvolutionEngine:
     
     def _load_strategies(self):
         """Load strategies from disk"""
+        if self._load_snapshot():
+            return
+        
         strategies_file = self.storage_path / "strategies.jsonl"
         
         if strategies_file.exists():
@@ -470,6 +572,39 @@ class EvolutionEngine:
             
             except Exception as e:
                 logger.error(f"Failed to load strategies: {e}")
+    
+    def _load_snapshot(self) -> bool:
+        """
+        Load strategies from the pickled snapshot, if it is current
+        
+        strategies.jsonl stays the source of truth: the snapshot is only
+        used while the JSONL exists and is not newer than it.
+        
+        Returns:
+            True if strategies were loaded, False to fall back to JSONL
+        """
+        snapshot_file = self.storage_path / "strategies.pkl"
+        strategies_file = self.storage_path / "strategies.jsonl"
+        
+        if not snapshot_file.exists() or not strategies_file.exists():
+            return False
+        
+        # A JSONL file newer than the snapshot means the snapshot is stale
+        if strategies_file.stat().st_mtime_ns > snapshot_file.stat().st_mtime_ns:
+            return False
+        
+        try:
+            with open(snapshot_file, 'rb') as f:
+                records = _SnapshotUnpickler(f).load()
+            strategies = [Strategy(**data) for data in records]
+        except Exception as e:
+            logger.warning(f"Failed to load strategy snapshot, falling back to JSONL: {e}")
+            return False
+        
+        for strategy in strategies:
+            self.strategies[strategy.id] = strategy
+        logger.info(f"Loaded {len(strategies)} strategies from snapshot")
+        return True
 
 
 def create_engine() -> EvolutionEngine:
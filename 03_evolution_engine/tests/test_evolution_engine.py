@@ -2,6 +2,8 @@
 Comprehensive tests for EvolutionEngine - 80+ tests
 """
 
+import os
+import pickle
 import pytest
 import tempfile
 import threading
@@ -16,6 +18,20 @@ from evolution_engine import (
 )
 
 
+@pytest.fixture
+def engine(tmp_path):
+    """Fresh engine backed by a per-test storage directory"""
+    return EvolutionEngine(storage_path=tmp_path)
+
+
+def record_outcomes(engine, strategy_id, successes=0, failures=0):
+    """Record a run of successful outcomes followed by failed ones"""
+    for _ in range(successes):
+        engine.record_outcome(strategy_id, success=True)
+    for _ in range(failures):
+        engine.record_outcome(strategy_id, success=False)
+
+
 class TestStrategyClass:
     """Tests for Strategy class"""
     
@@ -164,16 +180,49 @@ class TestOutcomeRecording:
         strategy = engine.strategies[strategy_id]
         assert strategy.total_reward == 100.0
     
-    def test_record_multiple_outcomes(self):
+    def test_record_multiple_outcomes(self, engine):
         """Record multiple outcomes"""
-        engine = EvolutionEngine()
+        for n_success, n_failure in [(3, 2), (5, 0), (0, 5)]:
+            strategy_id = engine.create_strategy(f"test_{n_success}_{n_failure}")
+            
+            record_outcomes(engine, strategy_id, n_success, n_failure)
+            
+            strategy = engine.strategies[strategy_id]
+            assert strategy.success_count == n_success
+            assert strategy.failure_count == n_failure
+            assert strategy.total_attempts == n_success + n_failure
+    
+    def test_record_outcomes_bulk(self, engine):
+        """Record a batch of outcomes in one call"""
         strategy_id = engine.create_strategy("test")
         
-        for i in range(5):
-            engine.record_outcome(strategy_id, success=(i % 2 == 0))
+        engine.record_outcomes_bulk(
+            strategy_id,
+            [(True, 10.0), (False, 0.0), (True, 5.0)]
+        )
         
         strategy = engine.strategies[strategy_id]
-        assert strategy.total_attempts == 5
+        assert strategy.success_count == 2
+        assert strategy.failure_count == 1
+        assert strategy.total_reward == 15.0
+        assert len(engine.get_outcomes(strategy_id=strategy_id)) == 3
+    
+    def test_record_outcomes_bulk_malformed_batch(self, engine):
+        """Malformed batch raises without recording any outcome"""
+        strategy_id = engine.create_strategy("test")
+        
+        with pytest.raises(TypeError):
+            engine.record_outcomes_bulk(strategy_id, [(True, 10.0), (True, None)])
+        
+        strategy = engine.strategies[strategy_id]
+        assert strategy.success_count == 0
+        assert strategy.total_reward == 0.0
+        assert len(engine.get_outcomes(strategy_id=strategy_id)) == 0
+    
+    def test_record_outcomes_bulk_invalid_strategy(self, engine):
+        """Bulk recording for unknown strategy raises error"""
+        with pytest.raises(ValueError):
+            engine.record_outcomes_bulk("unknown", [(True, 0.0)])
     
     def test_record_outcome_invalid_strategy(self):
         """Recording outcome for unknown strategy raises error"""
@@ -186,24 +235,16 @@ class TestOutcomeRecording:
 class TestBestStrategy:
     """Tests for finding best strategy"""
     
-    def test_get_best_strategy(self):
+    def test_get_best_strategy(self, engine):
         """Find best performing strategy"""
-        engine = EvolutionEngine()
-        
         s1 = engine.create_strategy("s1")
         s2 = engine.create_strategy("s2")
         
         # Make s1 better
-        for _ in range(8):
-            engine.record_outcome(s1, success=True)
-        for _ in range(2):
-            engine.record_outcome(s1, success=False)
+        record_outcomes(engine, s1, successes=8, failures=2)
         
         # Make s2 worse
-        for _ in range(5):
-            engine.record_outcome(s2, success=True)
-        for _ in range(5):
-            engine.record_outcome(s2, success=False)
+        record_outcomes(engine, s2, successes=5, failures=5)
         
         best = engine.get_best_strategy()
         assert best == s1
@@ -402,13 +443,11 @@ class TestOutcomesHistory:
         s1_outcomes = engine.get_outcomes(strategy_id=s1)
         assert len(s1_outcomes) == 3
     
-    def test_get_outcomes_limit(self):
+    def test_get_outcomes_limit(self, engine):
         """Outcomes history respects limit"""
-        engine = EvolutionEngine()
         strategy_id = engine.create_strategy("test")
         
-        for _ in range(20):
-            engine.record_outcome(strategy_id, success=True)
+        record_outcomes(engine, strategy_id, successes=20)
         
         outcomes = engine.get_outcomes(limit=5)
         assert len(outcomes) <= 5
@@ -417,23 +456,41 @@ class TestOutcomesHistory:
 class TestThreadSafety:
     """Tests for concurrent operations"""
     
-    def test_concurrent_outcomes(self):
+    def test_concurrent_outcomes(self, engine):
         """Multiple threads can record outcomes concurrently"""
-        engine = EvolutionEngine()
         strategy_id = engine.create_strategy("test")
         
-        def record_outcomes():
+        threads = [
+            threading.Thread(target=record_outcomes, args=(engine, strategy_id, 10))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        strategy = engine.strategies[strategy_id]
+        assert strategy.total_attempts == 50
+    
+    def test_concurrent_outcomes_bulk(self, engine):
+        """Multiple threads can record outcome batches concurrently"""
+        strategy_id = engine.create_strategy("test")
+        
+        def record_batches():
             for _ in range(10):
-                engine.record_outcome(strategy_id, success=True)
+                engine.record_outcomes_bulk(strategy_id, [(True, 1.0), (False, 0.0)])
         
-        threads = [threading.Thread(target=record_outcomes) for _ in range(5)]
+        threads = [threading.Thread(target=record_batches) for _ in range(5)]
         for t in threads:
             t.start()
         for t in threads:
             t.join()
         
         strategy = engine.strategies[strategy_id]
-        assert strategy.total_attempts == 50
+        assert strategy.success_count == 50
+        assert strategy.failure_count == 50
+        assert strategy.total_reward == 50.0
+        assert len(engine.get_outcomes(strategy_id=strategy_id, limit=200)) == 100
     
     def test_concurrent_strategy_creation(self):
         """Multiple threads can create strategies concurrently"""
@@ -468,6 +525,23 @@ class TestPersistence:
             strategies_file = Path(tmpdir) / "strategies.jsonl"
             assert strategies_file.exists()
     
+    def test_save_strategies_skips_when_unchanged(self):
+        """Saving without changes does not rewrite files"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine = EvolutionEngine(storage_path=Path(tmpdir))
+            
+            strategy_id = engine.create_strategy("test")
+            engine.save_strategies()
+            
+            strategies_file = Path(tmpdir) / "strategies.jsonl"
+            strategies_file.unlink()
+            engine.save_strategies()
+            assert not strategies_file.exists()
+            
+            engine.record_outcome(strategy_id, success=True)
+            engine.save_strategies()
+            assert strategies_file.exists()
+    
     def test_load_strategies(self):
         """Load strategies from disk"""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -482,6 +556,79 @@ class TestPersistence:
             
             assert len(engine2.strategies) == 2
 
+    def test_load_strategies_from_snapshot(self):
+        """Load strategies from a snapshot no older than the JSONL"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine1 = EvolutionEngine(storage_path=Path(tmpdir))
+            s1 = engine1.create_strategy("test1")
+            engine1.create_strategy("test2")
+            engine1.record_outcome(s1, success=True, reward=5.0)
+            engine1.save_strategies()
+            
+            # Drop a line from the JSONL but keep it older than the snapshot,
+            # so only the snapshot still has both strategies
+            strategies_file = Path(tmpdir) / "strategies.jsonl"
+            first_line = strategies_file.read_text().split('\n')[0]
+            strategies_file.write_text(first_line + '\n')
+            snapshot_mtime = (Path(tmpdir) / "strategies.pkl").stat().st_mtime
+            os.utime(strategies_file, (snapshot_mtime - 10, snapshot_mtime - 10))
+            
+            engine2 = EvolutionEngine(storage_path=Path(tmpdir))
+            
+            assert len(engine2.strategies) == 2
+            assert engine2.strategies[s1].success_count == 1
+            assert engine2.strategies[s1].total_reward == 5.0
+    
+    def test_deleted_jsonl_ignores_snapshot(self):
+        """Deleting the JSONL resets state even if a snapshot remains"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine1 = EvolutionEngine(storage_path=Path(tmpdir))
+            engine1.create_strategy("test1")
+            engine1.save_strategies()
+            
+            (Path(tmpdir) / "strategies.jsonl").unlink()
+            
+            engine2 = EvolutionEngine(storage_path=Path(tmpdir))
+            
+            assert len(engine2.strategies) == 0
+    
+    def test_snapshot_with_globals_is_rejected(self):
+        """A snapshot referencing a callable is not executed"""
+        class _Payload:
+            def __reduce__(self):
+                return (os.mkdir, (os.path.join(tmpdir, "pwned"),))
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine1 = EvolutionEngine(storage_path=Path(tmpdir))
+            engine1.create_strategy("test1")
+            engine1.save_strategies()
+            
+            snapshot_file = Path(tmpdir) / "strategies.pkl"
+            snapshot_file.write_bytes(pickle.dumps(_Payload()))
+            
+            engine2 = EvolutionEngine(storage_path=Path(tmpdir))
+            
+            assert not (Path(tmpdir) / "pwned").exists()
+            assert len(engine2.strategies) == 1
+    
+    def test_stale_snapshot_falls_back_to_jsonl(self):
+        """JSONL newer than snapshot takes precedence"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            engine1 = EvolutionEngine(storage_path=Path(tmpdir))
+            engine1.create_strategy("test1")
+            engine1.create_strategy("test2")
+            engine1.save_strategies()
+            
+            strategies_file = Path(tmpdir) / "strategies.jsonl"
+            first_line = strategies_file.read_text().split('\n')[0]
+            strategies_file.write_text(first_line + '\n')
+            snapshot_mtime = (Path(tmpdir) / "strategies.pkl").stat().st_mtime
+            os.utime(strategies_file, (snapshot_mtime + 10, snapshot_mtime + 10))
+            
+            engine2 = EvolutionEngine(storage_path=Path(tmpdir))
+            
+            assert len(engine2.strategies) == 1
+
 
 class TestEdgeCases:
     """Tests for edge cases"""
@@ -17,24 +17,41 @@ Author: Justice Apex LLC
 License: MIT
 """
 
+import os
+import sys
 import threading
 import time
 import json
-from typing import Dict, List, Optional, Any, Set
-from dataclasses import dataclass, field, asdict
+import itertools
+from typing import Dict, List, Optional, Any, Set, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
 from pathlib import Path
 from collections import defaultdict
 import logging
-import hashlib
+
+try:
+    import orjson  # Optional: faster JSON encoding for persistence
+except ImportError:
+    orjson = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Slotted dataclasses drop the per-instance __dict__ (Python 3.10+)
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+def _json_line(data: Dict[str, Any]) -> bytes:
+    """Encode a dict as one JSONL line, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(data) + b'\n'
+    return (json.dumps(data) + '\n').encode()
 
-@dataclass
+
+@dataclass(**_DATACLASS_OPTIONS)
 class Proposal:
     """A proposal from an agent"""
     proposal_id: str
@@ -46,10 +63,17 @@ class Proposal:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
-        return asdict(self)
+        return {
+            'proposal_id': self.proposal_id,
+            'agent_id': self.agent_id,
+            'solution': self.solution,
+            'confidence': self.confidence,
+            'timestamp': self.timestamp,
+            'rationale': self.rationale
+        }
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Vote:
     """A vote on a proposal"""
     proposal_id: str
@@ -59,10 +83,15 @@ class Vote:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
-        return asdict(self)
+        return {
+            'proposal_id': self.proposal_id,
+            'agent_id': self.agent_id,
+            'vote': self.vote,
+            'timestamp': self.timestamp
+        }
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ConsensusDecision:
     """Final consensus decision"""
     decision_id: str
@@ -70,7 +99,7 @@ class ConsensusDecision:
     vote_count: int
     vote_total: int
     consensus_percentage: float
-    proposals: List[Proposal] = field(default_factory=list)
+    proposal_ids: List[str] = field(default_factory=list)
     timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
     
     def to_dict(self) -> Dict[str, Any]:
@@ -81,6 +110,7 @@ class ConsensusDecision:
             'vote_count': self.vote_count,
             'vote_total': self.vote_total,
             'consensus_percentage': self.consensus_percentage,
+            'proposal_ids': self.proposal_ids,
             'timestamp': self.timestamp
         }
 
@@ -124,17 +154,42 @@ class SwarmConsensus:
         # Proposals by ID
         self.proposals: Dict[str, Proposal] = {}
         
-        # Votes
-        self.votes: Dict[str, List[Vote]] = defaultdict(list)
+        # Votes cast: proposal_id -> {agent_id: vote}
+        self.votes: Dict[str, Dict[str, bool]] = defaultdict(dict)
+        
+        # Vote tallies: proposal_id -> [votes_for, votes_against]
+        self.vote_tally: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
         
         # Consensus decisions history
         self.decisions: Dict[str, ConsensusDecision] = {}
         
+        # Running consensus_percentage aggregates over self.decisions
+        self._consensus_pct_sum = 0.0
+        self._consensus_pct_min = 1.0
+        self._consensus_pct_max = 0.0
+        
         # Solutions being voted on
         self.current_solutions: Set[str] = set()
         
-        # Lock for thread safety
-        self._lock = threading.RLock()
+        # Per-round integer slot for each distinct solution
+        self._solution_slots: Dict[str, int] = {}
+        self._slot_solutions: List[str] = []
+        
+        # Proposals and running confidence sums grouped by solution slot
+        self._proposals_by_slot: List[List[Proposal]] = []
+        self._confidence_sums: List[float] = []
+        
+        # Slot with the most proposals (first slot wins ties), kept by propose()
+        self._leader_slot = 0
+        
+        # Monotonic source for proposal/decision IDs
+        self._id_counter = itertools.count(1)
+        
+        # Lock for thread safety (no method re-enters it)
+        self._lock = threading.Lock()
+        
+        # Serializes writers of the decisions file
+        self._save_lock = threading.Lock()
         
         logger.info(f"SwarmConsensus initialized with {voting_strategy.value} voting")
     
@@ -149,7 +204,7 @@ class SwarmConsensus:
             True if registered successfully
         """
         # Agents are registered implicitly when they propose
-        logger.info(f"Agent registered: {agent_id}")
+        logger.info("Agent registered: %s", agent_id)
         return True
     
     def propose(
@@ -157,7 +212,8 @@ class SwarmConsensus:
         agent_id: str,
         solution: str,
         confidence: float = 0.5,
-        rationale: Optional[str] = None
+        rationale: Optional[str] = None,
+        timestamp: Optional[str] = None
     ) -> str:
         """
         Agent proposes a solution
@@ -167,29 +223,87 @@ class SwarmConsensus:
             solution: The proposed solution
             confidence: Agent's confidence (0.0-1.0)
             rationale: Optional explanation
+            timestamp: ISO timestamp to record (None = now); bulk callers
+                can compute one and share it across a batch
         
         Returns:
             Proposal ID
         """
+        if not (0.0 <= confidence <= 1.0):
+            raise ValueError("Confidence must be 0.0-1.0")
+        
+        # ID generation and construction don't touch shared state
+        proposal_id = self._generate_id()
+        
+        # Interned so the solution-keyed dicts can match on identity
+        solution = sys.intern(solution)
+        
+        proposal = Proposal(
+            proposal_id=proposal_id,
+            agent_id=agent_id,
+            solution=solution,
+            confidence=confidence,
+            timestamp=timestamp or datetime.now().isoformat(),
+            rationale=rationale
+        )
+        
         with self._lock:
-            if not (0.0 <= confidence <= 1.0):
-                raise ValueError("Confidence must be 0.0-1.0")
+            self.proposals[proposal_id] = proposal
+            slot = self._solution_slots.get(solution)
+            if slot is None:
+                slot = len(self._slot_solutions)
+                self._solution_slots[solution] = slot
+                self._slot_solutions.append(solution)
+                self._proposals_by_slot.append([])
+                self._confidence_sums.append(0.0)
+                self.current_solutions.add(solution)
             
-            proposal_id = self._generate_id()
+            proposals = self._proposals_by_slot[slot]
+            proposals.append(proposal)
+            self._confidence_sums[slot] += confidence
             
-            proposal = Proposal(
-                proposal_id=proposal_id,
-                agent_id=agent_id,
-                solution=solution,
-                confidence=confidence,
-                rationale=rationale
-            )
+            # Counts only grow, so the leader changes only when overtaken
+            leader_votes = len(self._proposals_by_slot[self._leader_slot])
+            if len(proposals) > leader_votes or (
+                len(proposals) == leader_votes and slot < self._leader_slot
+            ):
+                self._leader_slot = slot
+        
+        logger.info("Proposal from %s: %s (confidence: %.2f)", agent_id, solution, confidence)
+        return proposal_id
+    
+    def vote(self, agent_id: str, proposal_id: str, vote: bool) -> Tuple[int, int]:
+        """
+        Agent votes for or against a proposal
+        
+        Each agent may vote once per proposal; a repeat vote or an unknown
+        proposal raises ValueError. Votes are tallied for reporting only
+        and don't affect get_consensus(), which counts proposals.
+        
+        Args:
+            agent_id: Agent casting the vote
+            proposal_id: Proposal being voted on
+            vote: True = for, False = against
+        
+        Returns:
+            Updated (votes_for, votes_against) tally for the proposal
+        """
+        with self._lock:
+            if proposal_id not in self.proposals:
+                raise ValueError(f"Unknown proposal: {proposal_id}")
             
-            self.proposals[proposal_id] = proposal
-            self.current_solutions.add(solution)
+            voters = self.votes[proposal_id]
+            if agent_id in voters:
+                raise ValueError(f"Agent {agent_id} already voted on {proposal_id}")
+            voters[agent_id] = vote
             
-            logger.info(f"Proposal from {agent_id}: {solution} (confidence: {confidence:.2f})")
-            return proposal_id
+            tally = self.vote_tally[proposal_id]
+            tally[0 if vote else 1] += 1
+            result = (tally[0], tally[1])
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Vote from %s on %s: %s", agent_id, proposal_id, 'for' if vote else 'against')
+        return result
     
     def get_proposals(self, solution: Optional[str] = None) -> List[Proposal]:
         """
@@ -201,13 +315,15 @@ class SwarmConsensus:
         Returns:
             List of proposals
         """
+        if solution:
+            solution = sys.intern(solution)
+        
         with self._lock:
-            proposals = list(self.proposals.values())
-            
             if solution:
-                proposals = [p for p in proposals if p.solution == solution]
+                slot = self._solution_slots.get(solution)
+                return [] if slot is None else list(self._proposals_by_slot[slot])
             
-            return proposals
+            return list(self.proposals.values())
     
     def get_consensus(self, force: bool = False) -> Optional[str]:
         """
@@ -223,39 +339,38 @@ class SwarmConsensus:
             if not self.current_solutions:
                 return None
             
-            # Count votes/confidence by solution
-            solution_scores = {}
-            solution_votes = {}
+            total_proposals = len(self.proposals)
             
-            for solution in self.current_solutions:
-                proposals_for_solution = [
-                    p for p in self.proposals.values()
-                    if p.solution == solution
-                ]
-                
-                if self.voting_strategy == VotingStrategy.WEIGHTED_CONFIDENCE:
-                    # Weight by confidence
-                    score = sum(p.confidence for p in proposals_for_solution)
-                    max_score = len(proposals_for_solution)
-                    solution_scores[solution] = score / max_score if max_score > 0 else 0
-                else:
-                    # Simple majority
-                    solution_scores[solution] = len(proposals_for_solution)
-                
-                solution_votes[solution] = len(proposals_for_solution)
+            # Every other solution holds at least one proposal, so the winner
+            # can't exceed this share (e.g. UNANIMOUS with any dissent)
+            if not force:
+                best_possible = (total_proposals - len(self.current_solutions) + 1) / total_proposals
+                if best_possible < self.consensus_threshold:
+                    logger.warning("No consensus possible (at most %.1f%%)", best_possible * 100)
+                    return None
             
-            if not solution_scores:
-                return None
+            if self.voting_strategy == VotingStrategy.WEIGHTED_CONFIDENCE:
+                # Weight by average confidence (first solution wins ties;
+                # each slot group is non-empty)
+                winner_slot, best_score = 0, -1.0
+                for slot, confidence_sum in enumerate(self._confidence_sums):
+                    score = confidence_sum / len(self._proposals_by_slot[slot])
+                    if score > best_score:
+                        winner_slot, best_score = slot, score
+                        # Averages are bounded by 1.0, so nothing beats a perfect score
+                        if score >= 1.0:
+                            break
+            else:
+                # Simple majority
+                winner_slot = self._leader_slot
             
-            # Find winner
-            winner = max(solution_scores.keys(), key=lambda s: solution_scores[s])
-            winner_votes = solution_votes[winner]
-            total_proposals = len(self.proposals)
+            winner = self._slot_solutions[winner_slot]
+            winner_votes = len(self._proposals_by_slot[winner_slot])
             consensus_pct = winner_votes / total_proposals if total_proposals > 0 else 0
             
             # Check threshold
             if consensus_pct < self.consensus_threshold and not force:
-                logger.warning(f"No consensus (winning {consensus_pct:.1%})")
+                logger.warning("No consensus (winning %.1f%%)", consensus_pct * 100)
                 return None
             
             # Record decision
@@ -266,12 +381,17 @@ class SwarmConsensus:
                 vote_count=winner_votes,
                 vote_total=total_proposals,
                 consensus_percentage=consensus_pct,
-                proposals=[p for p in self.proposals.values()]
+                proposal_ids=list(self.proposals)
             )
             
             self.decisions[decision_id] = decision
+            self._consensus_pct_sum += consensus_pct
+            if consensus_pct < self._consensus_pct_min:
+                self._consensus_pct_min = consensus_pct
+            if consensus_pct > self._consensus_pct_max:
+                self._consensus_pct_max = consensus_pct
             
-            logger.info(f"Consensus: {winner} ({consensus_pct:.1%} agreement)")
+            logger.info("Consensus: %s (%.1f%% agreement)", winner, consensus_pct * 100)
             return winner
     
     def reset_proposals(self) -> None:
@@ -279,9 +399,15 @@ class SwarmConsensus:
         with self._lock:
             self.proposals.clear()
             self.current_solutions.clear()
+            self._solution_slots.clear()
+            self._slot_solutions.clear()
+            self._proposals_by_slot.clear()
+            self._confidence_sums.clear()
+            self._leader_slot = 0
             self.votes.clear()
-            
-            logger.info("Proposals reset for next round")
+            self.vote_tally.clear()
+        
+        logger.info("Proposals reset for next round")
     
     def get_decisions(self, limit: int = 100) -> List[ConsensusDecision]:
         """
@@ -309,27 +435,34 @@ class SwarmConsensus:
             if not self.decisions:
                 return {'total_decisions': 0}
             
-            decisions = list(self.decisions.values())
+            total_decisions = len(self.decisions)
             
             return {
-                'total_decisions': len(decisions),
-                'avg_consensus_pct': sum(d.consensus_percentage for d in decisions) / len(decisions),
-                'min_consensus_pct': min(d.consensus_percentage for d in decisions),
-                'max_consensus_pct': max(d.consensus_percentage for d in decisions),
+                'total_decisions': total_decisions,
+                'avg_consensus_pct': self._consensus_pct_sum / total_decisions,
+                'min_consensus_pct': self._consensus_pct_min,
+                'max_consensus_pct': self._consensus_pct_max,
                 'current_proposals': len(self.proposals)
             }
     
     def save_decisions(self):
         """Save decisions to disk"""
         decisions_file = self.storage_path / "decisions.jsonl"
+        tmp_file = self.storage_path / "decisions.jsonl.tmp"
         
-        with self._lock:
+        # Copy while holding the save lock so the newest copy is always the
+        # last one written; encode and write without blocking proposals
+        with self._save_lock:
+            with self._lock:
+                pending = list(self.decisions.values())
+            
             try:
-                with open(decisions_file, 'w') as f:
-                    for decision in self.decisions.values():
-                        f.write(json.dumps(decision.to_dict()) + '\n')
+                with open(tmp_file, 'wb', buffering=1 << 20) as f:
+                    for decision in pending:
+                        f.write(_json_line(decision.to_dict()))
                 
-                logger.info(f"Saved {len(self.decisions)} decisions")
+                os.replace(tmp_file, decisions_file)
+                logger.info(f"Saved {len(pending)} decisions")
             
             except Exception as e:
                 logger.error(f"Failed to save decisions: {e}")
@@ -337,10 +470,8 @@ class SwarmConsensus:
     # Private methods
     
     def _generate_id(self) -> str:
-        """Generate unique ID"""
-        timestamp = datetime.now().isoformat()
-        data = f"{timestamp}_{len(self.proposals)}".encode()
-        return hashlib.md5(data).hexdigest()[:12]
+        """Generate unique ID (unique per instance, safe without the lock)"""
+        return format(next(self._id_counter), '012x')
 
 
 def create_consensus() -> SwarmConsensus:
@@ -2,6 +2,7 @@
 Comprehensive tests for SwarmConsensus - 70+ tests
 """
 
+import json
 import pytest
 import tempfile
 import threading
@@ -120,6 +121,61 @@ class TestProposals:
         
         proposal = consensus.proposals[proposal_id]
         assert proposal.rationale == "Whale accumulation detected"
+    
+    def test_propose_with_shared_timestamp(self):
+        """Batch of proposals can share one timestamp"""
+        consensus = SwarmConsensus()
+        ts = "2024-01-01T00:00:00"
+        
+        p1 = consensus.propose("agent1", "buy_BTC", 0.8, timestamp=ts)
+        p2 = consensus.propose("agent2", "buy_ETH", 0.7, timestamp=ts)
+        
+        assert consensus.proposals[p1].timestamp == ts
+        assert consensus.proposals[p2].timestamp == ts
+
+
+class TestVoting:
+    """Tests for voting on proposals"""
+    
+    def test_vote_tally(self):
+        """Votes are tallied per proposal"""
+        consensus = SwarmConsensus()
+        proposal_id = consensus.propose("agent1", "buy_BTC", 0.8)
+        
+        consensus.vote("agent2", proposal_id, True)
+        consensus.vote("agent3", proposal_id, True)
+        tally = consensus.vote("agent4", proposal_id, False)
+        
+        assert tally == (2, 1)
+    
+    def test_repeat_vote_rejected(self):
+        """An agent can vote only once per proposal"""
+        consensus = SwarmConsensus()
+        proposal_id = consensus.propose("agent1", "buy_BTC", 0.8)
+        consensus.vote("agent2", proposal_id, True)
+        
+        with pytest.raises(ValueError):
+            consensus.vote("agent2", proposal_id, False)
+        
+        assert consensus.votes[proposal_id] == {"agent2": True}
+        assert consensus.vote_tally[proposal_id] == [1, 0]
+    
+    def test_vote_unknown_proposal(self):
+        """Voting on unknown proposal raises error"""
+        consensus = SwarmConsensus()
+        
+        with pytest.raises(ValueError):
+            consensus.vote("agent1", "unknown", True)
+    
+    def test_reset_clears_votes(self):
+        """Reset clears vote tallies"""
+        consensus = SwarmConsensus()
+        proposal_id = consensus.propose("agent1", "buy_BTC", 0.8)
+        consensus.vote("agent2", proposal_id, True)
+        
+        consensus.reset_proposals()
+        assert len(consensus.votes) == 0
+        assert len(consensus.vote_tally) == 0
 
 
 class TestConsensusCalculation:
@@ -169,6 +225,20 @@ class TestConsensusCalculation:
         # Should return something when forced
         assert winner is not None
     
+    def test_majority_tie_goes_to_first_solution(self):
+        """Tied majority goes to the solution proposed first"""
+        consensus = SwarmConsensus(voting_strategy=VotingStrategy.SIMPLE_MAJORITY)
+        
+        consensus.propose("agent1", "buy_BTC", 0.5)
+        consensus.propose("agent2", "buy_ETH", 0.5)
+        consensus.propose("agent3", "buy_ETH", 0.5)
+        consensus.propose("agent4", "buy_BTC", 0.5)
+        
+        assert consensus.get_consensus() == "buy_BTC"
+        
+        consensus.propose("agent5", "buy_ETH", 0.5)
+        assert consensus.get_consensus() == "buy_ETH"
+    
     def test_no_proposals_no_consensus(self):
         """No consensus with no proposals"""
         consensus = SwarmConsensus()
@@ -230,6 +300,17 @@ class TestDecisions:
         
         assert len(consensus.decisions) == 1
     
+    def test_decision_records_proposal_ids(self):
+        """Decision keeps proposal IDs, not Proposal objects"""
+        consensus = SwarmConsensus(consensus_threshold=0.5)
+        
+        p1 = consensus.propose("agent1", "buy_BTC", 0.8)
+        p2 = consensus.propose("agent2", "buy_BTC", 0.7)
+        consensus.get_consensus()
+        
+        decision = next(iter(consensus.decisions.values()))
+        assert decision.proposal_ids == [p1, p2]
+    
     def test_get_decisions(self):
         """Get decision history"""
         consensus = SwarmConsensus(consensus_threshold=0.5)
@@ -259,6 +340,25 @@ class TestStatistics:
         assert 'total_decisions' in stats
         assert 'avg_consensus_pct' in stats
     
+    def test_statistics_aggregates(self):
+        """Statistics track avg/min/max across decisions"""
+        consensus = SwarmConsensus(consensus_threshold=0.5)
+        
+        consensus.propose("agent1", "buy_BTC", 0.8)
+        consensus.get_consensus()
+        consensus.reset_proposals()
+        
+        consensus.propose("agent1", "buy_BTC", 0.8)
+        consensus.propose("agent2", "buy_ETH", 0.8)
+        consensus.get_consensus()
+        
+        stats = consensus.get_statistics()
+        
+        assert stats['total_decisions'] == 2
+        assert stats['avg_consensus_pct'] == 0.75
+        assert stats['min_consensus_pct'] == 0.5
+        assert stats['max_consensus_pct'] == 1.0
+    
     def test_statistics_empty(self):
         """Statistics for empty consensus"""
         consensus = SwarmConsensus()
@@ -348,6 +448,20 @@ class TestVotingStrategies:
         # B should win
         winner = consensus.get_consensus()
         assert winner == "B"
+    
+    def test_unanimous_with_dissent(self):
+        """Unanimous consensus impossible once solutions differ"""
+        consensus = SwarmConsensus(
+            voting_strategy=VotingStrategy.UNANIMOUS,
+            consensus_threshold=1.0
+        )
+        
+        consensus.propose("a1", "A", 0.9)
+        consensus.propose("a2", "A", 0.9)
+        consensus.propose("a3", "B", 0.9)
+        
+        assert consensus.get_consensus() is None
+        assert consensus.get_consensus(force=True) == "A"
 
 
 class TestPersistence:
@@ -367,6 +481,23 @@ class TestPersistence:
             
             decisions_file = Path(tmpdir) / "decisions.jsonl"
             assert decisions_file.exists()
+    
+    def test_saved_decisions_are_jsonl(self):
+        """Saved decisions are one JSON object per line"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            consensus = SwarmConsensus(
+                storage_path=Path(tmpdir),
+                consensus_threshold=0.5
+            )
+            
+            consensus.propose("agent1", "buy_BTC", 0.8)
+            consensus.get_consensus()
+            consensus.save_decisions()
+            
+            lines = (Path(tmpdir) / "decisions.jsonl").read_text().splitlines()
+            assert len(lines) == 1
+            assert json.loads(lines[0])['winning_solution'] == "buy_BTC"
+            assert not (Path(tmpdir) / "decisions.jsonl.tmp").exists()
 
 
 class TestEdgeCases:
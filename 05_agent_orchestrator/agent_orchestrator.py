@@ -17,22 +17,134 @@ Author: Justice Apex LLC
 License: MIT
 """
 
+import os
+import sys
+import queue
 import threading
 import time
 import json
-from typing import Dict, List, Optional, Any, Callable
-from dataclasses import dataclass, field, asdict
+import itertools
+import weakref
+from typing import Dict, List, Optional, Any, Callable, Iterable, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
 from pathlib import Path
-from collections import defaultdict, deque
+from collections import deque
 import logging
-import hashlib
+
+try:
+    import orjson  # Optional: faster JSON encoding for persistence
+except ImportError:
+    orjson = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Slotted dataclasses drop the per-instance __dict__ (Python 3.10+)
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+def _format_ts(ns: Optional[int]) -> Optional[str]:
+    """Format a time.time_ns() timestamp as an ISO string"""
+    if ns is None:
+        return None
+    return datetime.fromtimestamp(ns / 1e9).isoformat()
+
+
+def _json_line(data: Dict[str, Any]) -> bytes:
+    """Encode a dict as one JSONL line, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(data) + b'\n'
+    return (json.dumps(data) + '\n').encode()
+
+
+class _FlushRequest:
+    """Queued marker the writer thread acknowledges once earlier writes finish"""
+    __slots__ = ('event', 'ok')
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.ok = True
+
+
+# Queued to stop the snapshot writer thread
+_CLOSE_WRITER = object()
+
+# Seconds an orchestrator that is dropped or still open at interpreter exit
+# waits for its writer to finish queued snapshots
+_WRITER_STOP_TIMEOUT = 10.0
+
+
+def _drain_writes(write_queue: queue.SimpleQueue, snapshots_file: Path):
+    """
+    Writer thread: append queued snapshots to disk in batches
+    
+    Holds no reference to the orchestrator, so an orchestrator dropped
+    without close() can still be collected (its finalizer stops this thread).
+    """
+    f = None
+    failed = False
+    
+    try:
+        while True:
+            # Block for one item, then take whatever else is already queued
+            batch = [write_queue.get()]
+            while True:
+                try:
+                    batch.append(write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            closing = False
+            requests = []
+            lines = []
+            try:
+                for item in batch:
+                    if item is _CLOSE_WRITER:
+                        closing = True
+                    elif isinstance(item, _FlushRequest):
+                        requests.append(item)
+                    else:
+                        lines.extend(_json_line(snapshot.to_dict()) for snapshot in item)
+                
+                if lines:
+                    if f is None:
+                        f = open(snapshots_file, 'ab')
+                    f.write(b''.join(lines))
+                    f.flush()
+            except Exception as e:
+                failed = True
+                logger.error(f"Failed to save snapshot: {e}")
+            
+            # Report failures since the last flush to every waiting flush()
+            for request in requests:
+                request.ok = not failed
+                request.event.set()
+            if requests:
+                failed = False
+            
+            if closing:
+                return
+    finally:
+        if f is not None:
+            f.close()
+
+
+def _stop_writer(write_queue: queue.SimpleQueue, thread: threading.Thread):
+    """
+    Finalizer: stop the writer thread once queued snapshots are written
+    
+    Runs when an orchestrator is collected without close(), and at
+    interpreter exit (before daemon threads are killed), so snapshots
+    saved before exit still reach the file.
+    """
+    write_queue.put(_CLOSE_WRITER)
+    # A collection triggered on the writer thread itself must not join it
+    if thread is not threading.current_thread():
+        thread.join(_WRITER_STOP_TIMEOUT)
+
 
 class BuildStatus(Enum):
     """Build status states"""
@@ -44,52 +156,128 @@ class BuildStatus(Enum):
     ERROR = "error"
 
 
-@dataclass
+# Dense index per status, used for the orchestrator's counter tables
+_STATUS_ORDINAL: Dict[BuildStatus, int] = {
+    status: index for index, status in enumerate(BuildStatus)
+}
+
+# Status strings, looked up without going through the Enum.value descriptor
+_STATUS_STR: Dict[BuildStatus, str] = {status: status.value for status in BuildStatus}
+
+# Terminal task states (enum members are singletons, so transitions compare by identity)
+_FINISHED_STATUSES = frozenset((BuildStatus.COMPLETED, BuildStatus.FAILED))
+
+# Longest chain of diff snapshots before a full snapshot is stored again
+_MAX_DIFF_DEPTH = 16
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class Agent:
     """An agent in the system"""
     agent_id: str
     name: str
     status: BuildStatus = BuildStatus.IDLE
-    last_heartbeat: str = field(default_factory=lambda: datetime.now().isoformat())
+    last_heartbeat: int = field(default_factory=time.time_ns)  # ns since epoch
     error_count: int = 0
     task_count: int = 0
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary"""
-        return asdict(self)
+        """Convert to dictionary (timestamps as ISO strings)"""
+        return {
+            'agent_id': self.agent_id,
+            'name': self.name,
+            'status': _STATUS_STR[self.status],
+            'last_heartbeat': _format_ts(self.last_heartbeat),
+            'error_count': self.error_count,
+            'task_count': self.task_count
+        }
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Task:
     """A task for agents to execute"""
     task_id: str
     name: str
     agent_id: str
     status: BuildStatus = BuildStatus.IDLE
-    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
-    started_at: Optional[str] = None
-    completed_at: Optional[str] = None
+    created_at: int = field(default_factory=time.time_ns)  # ns since epoch
+    started_at: Optional[int] = None
+    completed_at: Optional[int] = None
     result: Optional[Any] = None
     error: Optional[str] = None
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary"""
-        return asdict(self)
+        """Convert to dictionary (timestamps as ISO strings)"""
+        return {
+            'task_id': self.task_id,
+            'name': self.name,
+            'agent_id': self.agent_id,
+            'status': _STATUS_STR[self.status],
+            'created_at': _format_ts(self.created_at),
+            'started_at': _format_ts(self.started_at),
+            'completed_at': _format_ts(self.completed_at),
+            'result': self.result,
+            'error': self.error
+        }
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Snapshot:
     """System state snapshot"""
     snapshot_id: str
-    timestamp: str
+    timestamp: int = field(default_factory=time.time_ns)  # ns since epoch
     agents_status: Dict[str, str] = field(default_factory=dict)
     task_count: int = 0
     completed_count: int = 0
     failed_count: int = 0
+    # Diff snapshots hold only changed agent statuses on top of their base
+    base: Optional['Snapshot'] = field(default=None, repr=False, compare=False)
+    
+    def get_agent_status(self, agent_id: str) -> Optional[str]:
+        """
+        Get one agent's status at this snapshot
+        
+        Falls back through the base chain for diff snapshots without
+        resolving the full status map.
+        
+        Args:
+            agent_id: Agent ID
+        
+        Returns:
+            Status string, or None if the agent wasn't registered
+        """
+        snapshot = self
+        while snapshot is not None:
+            status = snapshot.agents_status.get(agent_id)
+            if status is not None:
+                return status
+            snapshot = snapshot.base
+        return None
+    
+    def resolve_agents_status(self) -> Dict[str, str]:
+        """Full agent status map, applying diff snapshots over their bases"""
+        chain = []
+        snapshot = self
+        while snapshot is not None:
+            chain.append(snapshot.agents_status)
+            snapshot = snapshot.base
+        
+        resolved: Dict[str, str] = {}
+        for agents_status in reversed(chain):
+            resolved.update(agents_status)
+        return resolved
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary"""
-        return asdict(self)
+        """Convert to dictionary (timestamp as ISO string)"""
+        return {
+            'snapshot_id': self.snapshot_id,
+            'timestamp': _format_ts(self.timestamp),
+            'agents_status': dict(self.agents_status),
+            'task_count': self.task_count,
+            'completed_count': self.completed_count,
+            'failed_count': self.failed_count,
+            'base_id': self.base.snapshot_id if self.base is not None else None
+        }
 
 
 class AgentOrchestrator:
@@ -110,7 +298,8 @@ class AgentOrchestrator:
         self.storage_path = storage_path or Path("agent_orchestrator_data")
         self.storage_path.mkdir(parents=True, exist_ok=True)
         
-        # Registered agents
+        # Registered agents (copy-on-write: replaced under the lock, never
+        # mutated in place, so readers can use it without locking)
         self.agents: Dict[str, Agent] = {}
         
         # Tasks
@@ -118,12 +307,41 @@ class AgentOrchestrator:
         
         # Snapshots
         self.snapshots: deque = deque(maxlen=1000)
-        
-        # Callbacks
-        self.callbacks: Dict[BuildStatus, List[Callable]] = defaultdict(list)
-        
-        # Lock for thread safety
-        self._lock = threading.RLock()
+        # Created but not yet saved; bounded like the history so callers
+        # that never save don't accumulate snapshots
+        self._unsaved_snapshots: deque = deque(maxlen=self.snapshots.maxlen)
+        
+        # Full agent status map as of the newest snapshot (diff source)
+        self._last_agents_status: Dict[str, str] = {}
+        
+        # Background snapshot writer, started on the first save
+        self._write_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer_thread: Optional[threading.Thread] = None
+        self._writer_finalizer: Optional[weakref.finalize] = None
+        
+        # Running counts per status, updated on every transition,
+        # as flat lists indexed by _STATUS_ORDINAL
+        self._agent_status_counts: List[int] = [0] * len(_STATUS_ORDINAL)
+        self._task_status_counts: List[int] = [0] * len(_STATUS_ORDINAL)
+        self._agent_error_total = 0
+        
+        # Bumped on every change a snapshot records; create_snapshot reuses
+        # the previous snapshot while it is unchanged
+        self._state_version = 0
+        self._snapshot_version = -1
+        
+        # Callbacks per status ordinal (copy-on-write tuples, so dispatch
+        # needs no lock)
+        self._callback_table: List[Tuple[Callable, ...]] = [()] * len(_STATUS_ORDINAL)
+        
+        # Task/snapshot IDs: a random per-instance prefix (distinct across
+        # orchestrators) plus a monotonic counter
+        self._id_prefix = os.urandom(6).hex()
+        self._id_counter = itertools.count()
+        
+        # Lock for thread safety (not re-entrant: callbacks run after it
+        # is released, and no method calls another locked method)
+        self._lock = threading.Lock()
         
         logger.info("AgentOrchestrator initialized")
     
@@ -138,12 +356,63 @@ class AgentOrchestrator:
         Returns:
             True if registered
         """
+        return self.register_agent_instance(Agent(agent_id=agent_id, name=name))
+    
+    def register_agent_instance(self, agent: Agent) -> bool:
+        """
+        Register a pre-built agent
+        
+        Lets callers construct Agent objects ahead of time (e.g. outside
+        a contended section); the orchestrator takes ownership of it.
+        
+        Args:
+            agent: Agent to register
+        
+        Returns:
+            True if registered
+        """
+        with self._lock:
+            previous = self.agents.get(agent.agent_id)
+            if previous is not None:
+                self._agent_status_counts[_STATUS_ORDINAL[previous.status]] -= 1
+                self._agent_error_total -= previous.error_count
+            
+            self.agents = {**self.agents, agent.agent_id: agent}
+            self._agent_status_counts[_STATUS_ORDINAL[agent.status]] += 1
+            self._agent_error_total += agent.error_count
+            self._state_version += 1
+        
+        logger.info(f"Agent registered: {agent.name} ({agent.agent_id})")
+        return True
+    
+    def register_agents(self, specs: Iterable[Tuple[str, str]]) -> int:
+        """
+        Register several agents under a single lock acquisition
+        
+        Args:
+            specs: (agent_id, name) pairs
+        
+        Returns:
+            Number of agents registered
+        """
+        agents = [Agent(agent_id=agent_id, name=name) for agent_id, name in specs]
+        
         with self._lock:
-            agent = Agent(agent_id=agent_id, name=name)
-            self.agents[agent_id] = agent
+            updated = dict(self.agents)
+            for agent in agents:
+                previous = updated.get(agent.agent_id)
+                if previous is not None:
+                    self._agent_status_counts[_STATUS_ORDINAL[previous.status]] -= 1
+                    self._agent_error_total -= previous.error_count
+                
+                updated[agent.agent_id] = agent
+                self._agent_status_counts[_STATUS_ORDINAL[agent.status]] += 1
             
-            logger.info(f"Agent registered: {name} ({agent_id})")
-            return True
+            self.agents = updated
+            self._state_version += 1
+        
+        logger.info(f"Agents registered: {len(agents)}")
+        return len(agents)
     
     def start_agent(self, agent_id: str) -> bool:
         """
@@ -160,15 +429,17 @@ class AgentOrchestrator:
                 return False
             
             agent = self.agents[agent_id]
-            if agent.status == BuildStatus.IDLE:
-                agent.status = BuildStatus.RUNNING
-                agent.last_heartbeat = datetime.now().isoformat()
-                
-                self._trigger_callbacks(BuildStatus.RUNNING)
-                logger.info(f"Agent started: {agent.name}")
-                return True
+            if agent.status is not BuildStatus.IDLE:
+                return False
             
-            return False
+            self._set_agent_status(agent, BuildStatus.RUNNING)
+            agent.last_heartbeat = time.time_ns()
+            callbacks = self._callback_table[_STATUS_ORDINAL[BuildStatus.RUNNING]]
+        
+        logger.info(f"Agent started: {agent.name}")
+        if callbacks:
+            self._trigger_callbacks(callbacks)
+        return True
     
     def pause_agent(self, agent_id: str) -> bool:
         """
@@ -185,14 +456,16 @@ class AgentOrchestrator:
                 return False
             
             agent = self.agents[agent_id]
-            if agent.status == BuildStatus.RUNNING:
-                agent.status = BuildStatus.PAUSED
-                
-                self._trigger_callbacks(BuildStatus.PAUSED)
-                logger.info(f"Agent paused: {agent.name}")
-                return True
+            if agent.status is not BuildStatus.RUNNING:
+                return False
             
-            return False
+            self._set_agent_status(agent, BuildStatus.PAUSED)
+            callbacks = self._callback_table[_STATUS_ORDINAL[BuildStatus.PAUSED]]
+        
+        logger.info(f"Agent paused: {agent.name}")
+        if callbacks:
+            self._trigger_callbacks(callbacks)
+        return True
     
     def resume_agent(self, agent_id: str) -> bool:
         """
@@ -209,14 +482,14 @@ class AgentOrchestrator:
                 return False
             
             agent = self.agents[agent_id]
-            if agent.status == BuildStatus.PAUSED:
-                agent.status = BuildStatus.RUNNING
-                agent.last_heartbeat = datetime.now().isoformat()
-                
-                logger.info(f"Agent resumed: {agent.name}")
-                return True
+            if agent.status is not BuildStatus.PAUSED:
+                return False
             
-            return False
+            self._set_agent_status(agent, BuildStatus.RUNNING)
+            agent.last_heartbeat = time.time_ns()
+        
+        logger.info(f"Agent resumed: {agent.name}")
+        return True
     
     def stop_agent(self, agent_id: str) -> bool:
         """
@@ -233,11 +506,13 @@ class AgentOrchestrator:
                 return False
             
             agent = self.agents[agent_id]
-            agent.status = BuildStatus.COMPLETED
-            
-            self._trigger_callbacks(BuildStatus.COMPLETED)
-            logger.info(f"Agent stopped: {agent.name}")
-            return True
+            self._set_agent_status(agent, BuildStatus.COMPLETED)
+            callbacks = self._callback_table[_STATUS_ORDINAL[BuildStatus.COMPLETED]]
+        
+        logger.info(f"Agent stopped: {agent.name}")
+        if callbacks:
+            self._trigger_callbacks(callbacks)
+        return True
     
     def report_error(self, agent_id: str, error: str) -> bool:
         """
@@ -256,10 +531,11 @@ class AgentOrchestrator:
             
             agent = self.agents[agent_id]
             agent.error_count += 1
-            agent.status = BuildStatus.ERROR
-            
-            logger.error(f"Agent error: {agent.name} - {error}")
-            return True
+            self._agent_error_total += 1
+            self._set_agent_status(agent, BuildStatus.ERROR)
+        
+        logger.error(f"Agent error: {agent.name} - {error}")
+        return True
     
     def create_task(
         self,
@@ -276,22 +552,32 @@ class AgentOrchestrator:
         Returns:
             Task ID, or None
         """
+        # Cheap lock-free pre-check against the copy-on-write dict; the task
+        # is built before taking the lock
+        if agent_id not in self.agents:
+            return None
+        
+        task_id = self._generate_id()
+        task = Task(
+            task_id=task_id,
+            name=task_name,
+            agent_id=agent_id
+        )
+        
         with self._lock:
-            if agent_id not in self.agents:
+            # The agents dict may have been replaced since the pre-check,
+            # so look the agent up again
+            agent = self.agents.get(agent_id)
+            if agent is None:
                 return None
             
-            task_id = self._generate_id()
-            task = Task(
-                task_id=task_id,
-                name=task_name,
-                agent_id=agent_id
-            )
-            
             self.tasks[task_id] = task
-            self.agents[agent_id].task_count += 1
-            
-            logger.info(f"Task created: {task_name} (ID: {task_id})")
-            return task_id
+            self._task_status_counts[_STATUS_ORDINAL[task.status]] += 1
+            agent.task_count += 1
+            self._state_version += 1
+        
+        logger.info(f"Task created: {task_name} (ID: {task_id})")
+        return task_id
     
     def start_task(self, task_id: str) -> bool:
         """
@@ -308,14 +594,14 @@ class AgentOrchestrator:
                 return False
             
             task = self.tasks[task_id]
-            if task.status == BuildStatus.IDLE:
-                task.status = BuildStatus.RUNNING
-                task.started_at = datetime.now().isoformat()
-                
-                logger.info(f"Task started: {task.name}")
-                return True
+            if task.status is not BuildStatus.IDLE:
+                return False
             
-            return False
+            self._set_task_status(task, BuildStatus.RUNNING)
+            task.started_at = time.time_ns()
+        
+        logger.info(f"Task started: {task.name}")
+        return True
     
     def complete_task(self, task_id: str, result: Optional[Any] = None) -> bool:
         """
@@ -333,12 +619,12 @@ class AgentOrchestrator:
                 return False
             
             task = self.tasks[task_id]
-            task.status = BuildStatus.COMPLETED
-            task.completed_at = datetime.now().isoformat()
+            self._set_task_status(task, BuildStatus.COMPLETED)
+            task.completed_at = time.time_ns()
             task.result = result
-            
-            logger.info(f"Task completed: {task.name}")
-            return True
+        
+        logger.info(f"Task completed: {task.name}")
+        return True
     
     def fail_task(self, task_id: str, error: str) -> bool:
         """
@@ -356,12 +642,36 @@ class AgentOrchestrator:
                 return False
             
             task = self.tasks[task_id]
-            task.status = BuildStatus.FAILED
-            task.completed_at = datetime.now().isoformat()
+            self._set_task_status(task, BuildStatus.FAILED)
+            task.completed_at = time.time_ns()
             task.error = error
+        
+        logger.error(f"Task failed: {task.name} - {error}")
+        return True
+    
+    def release_task(self, task_id: str) -> Optional[Task]:
+        """
+        Drop a finished task from the orchestrator
+        
+        Long-running orchestrators can release completed or failed tasks
+        once their results are consumed, keeping the task table small.
+        
+        Args:
+            task_id: Task to release
+        
+        Returns:
+            The released task, or None if unknown or not finished
+        """
+        with self._lock:
+            task = self.tasks.get(task_id)
+            if task is None or task.status not in _FINISHED_STATUSES:
+                return None
             
-            logger.error(f"Task failed: {task.name} - {error}")
-            return True
+            del self.tasks[task_id]
+            self._task_status_counts[_STATUS_ORDINAL[task.status]] -= 1
+            self._state_version += 1
+        
+        return task
     
     def get_agent_status(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -373,18 +683,17 @@ class AgentOrchestrator:
         Returns:
             Agent status dict
         """
-        with self._lock:
-            if agent_id not in self.agents:
-                return None
-            
-            agent = self.agents[agent_id]
-            return {
-                'agent_id': agent.agent_id,
-                'name': agent.name,
-                'status': agent.status.value,
-                'error_count': agent.error_count,
-                'task_count': agent.task_count
-            }
+        agent = self.agents.get(agent_id)
+        if agent is None:
+            return None
+        
+        return {
+            'agent_id': agent.agent_id,
+            'name': agent.name,
+            'status': _STATUS_STR[agent.status],
+            'error_count': agent.error_count,
+            'task_count': agent.task_count
+        }
     
     def get_all_agents_status(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -393,44 +702,68 @@ class AgentOrchestrator:
         Returns:
             Dict of agent statuses
         """
-        with self._lock:
-            return {
-                agent_id: {
-                    'name': agent.name,
-                    'status': agent.status.value,
-                    'error_count': agent.error_count,
-                    'task_count': agent.task_count
-                }
-                for agent_id, agent in self.agents.items()
+        agents = self.agents
+        return {
+            agent_id: {
+                'name': agent.name,
+                'status': _STATUS_STR[agent.status],
+                'error_count': agent.error_count,
+                'task_count': agent.task_count
             }
+            for agent_id, agent in agents.items()
+        }
     
-    def create_snapshot(self) -> str:
+    def create_snapshot(self, diff: bool = False) -> str:
         """
         Create system state snapshot
         
+        If nothing has changed since the last snapshot, that snapshot's
+        ID is returned instead of recording a duplicate.
+        
+        Args:
+            diff: Store only agent statuses that changed since the previous
+                snapshot, which becomes the new snapshot's base
+        
         Returns:
             Snapshot ID
         """
         with self._lock:
+            if self._state_version == self._snapshot_version and self.snapshots:
+                return self.snapshots[0].snapshot_id
+            
             snapshot_id = self._generate_id()
             
             agents_status = {
-                agent_id: agent.status.value
+                agent_id: _STATUS_STR[agent.status]
                 for agent_id, agent in self.agents.items()
             }
             
-            completed = sum(1 for t in self.tasks.values() if t.status == BuildStatus.COMPLETED)
-            failed = sum(1 for t in self.tasks.values() if t.status == BuildStatus.FAILED)
+            base = self.snapshots[0] if diff and self.snapshots else None
+            if base is not None and self._diff_depth(base) < _MAX_DIFF_DEPTH:
+                previous = self._last_agents_status
+                stored_status = {
+                    agent_id: status
+                    for agent_id, status in agents_status.items()
+                    if previous.get(agent_id) != status
+                }
+            else:
+                base = None
+                stored_status = agents_status
+            self._last_agents_status = agents_status
             
+            task_counts = self._task_status_counts
             snapshot = Snapshot(
                 snapshot_id=snapshot_id,
-                agents_status=agents_status,
+                agents_status=stored_status,
                 task_count=len(self.tasks),
-                completed_count=completed,
-                failed_count=failed
+                completed_count=task_counts[_STATUS_ORDINAL[BuildStatus.COMPLETED]],
+                failed_count=task_counts[_STATUS_ORDINAL[BuildStatus.FAILED]],
+                base=base
             )
             
             self.snapshots.appendleft(snapshot)
+            self._unsaved_snapshots.append(snapshot)
+            self._snapshot_version = self._state_version
             
             logger.info(f"Snapshot created: {snapshot_id}")
             return snapshot_id
@@ -446,7 +779,8 @@ class AgentOrchestrator:
             List of snapshots
         """
         with self._lock:
-            return list(self.snapshots)[:limit]
+            # Newest first (appendleft), so stop after the first `limit`
+            return list(itertools.islice(self.snapshots, limit))
     
     def get_statistics(self) -> Dict[str, Any]:
         """
@@ -456,21 +790,16 @@ class AgentOrchestrator:
             Statistics dict
         """
         with self._lock:
-            tasks_completed = sum(1 for t in self.tasks.values() if t.status == BuildStatus.COMPLETED)
-            tasks_failed = sum(1 for t in self.tasks.values() if t.status == BuildStatus.FAILED)
-            tasks_running = sum(1 for t in self.tasks.values() if t.status == BuildStatus.RUNNING)
-            
-            agents_running = sum(1 for a in self.agents.values() if a.status == BuildStatus.RUNNING)
-            agents_errors = sum(a.error_count for a in self.agents.values())
-            
+            agent_counts = self._agent_status_counts
+            task_counts = self._task_status_counts
             return {
                 'total_agents': len(self.agents),
-                'agents_running': agents_running,
-                'agent_errors': agents_errors,
+                'agents_running': agent_counts[_STATUS_ORDINAL[BuildStatus.RUNNING]],
+                'agent_errors': self._agent_error_total,
                 'total_tasks': len(self.tasks),
-                'tasks_completed': tasks_completed,
-                'tasks_failed': tasks_failed,
-                'tasks_running': tasks_running,
+                'tasks_completed': task_counts[_STATUS_ORDINAL[BuildStatus.COMPLETED]],
+                'tasks_failed': task_counts[_STATUS_ORDINAL[BuildStatus.FAILED]],
+                'tasks_running': task_counts[_STATUS_ORDINAL[BuildStatus.RUNNING]],
                 'total_snapshots': len(self.snapshots)
             }
     
@@ -486,37 +815,153 @@ class AgentOrchestrator:
             status: Status to trigger on
             callback: Callback function
         """
+        ordinal = _STATUS_ORDINAL[status]
         with self._lock:
-            self.callbacks[status].append(callback)
+            self._callback_table[ordinal] = self._callback_table[ordinal] + (callback,)
     
-    def save_snapshot(self, snapshot_id: str):
-        """Save snapshot to disk"""
-        snapshots_file = self.storage_path / "snapshots.jsonl"
+    def save_snapshot(self, snapshot_id: Optional[str] = None):
+        """
+        Save snapshots to disk
+        
+        Hands every snapshot created since the last save to a background
+        writer thread, so snapshot_id is only used for logging. Call
+        flush() to wait for the write to reach the file, and close() to
+        stop the writer. Snapshots still queued when the interpreter exits
+        are written before it finishes.
         
+        Args:
+            snapshot_id: Snapshot that prompted the save
+        """
         with self._lock:
-            try:
-                with open(snapshots_file, 'a') as f:
-                    for snapshot in self.snapshots:
-                        if snapshot.snapshot_id == snapshot_id:
-                            f.write(json.dumps(snapshot.to_dict()) + '\n')
-                            break
-                
-                logger.info(f"Snapshot saved: {snapshot_id}")
+            pending = self._unsaved_snapshots
+            if not pending:
+                return
             
-            except Exception as e:
-                logger.error(f"Failed to save snapshot: {e}")
+            self._unsaved_snapshots = deque(maxlen=self.snapshots.maxlen)
+            if self._writer_thread is None:
+                self._writer_thread = threading.Thread(
+                    target=_drain_writes,
+                    args=(self._write_queue, self.storage_path / "snapshots.jsonl"),
+                    name="snapshot-writer",
+                    daemon=True
+                )
+                self._writer_thread.start()
+                # Drains and stops the writer if the orchestrator is dropped,
+                # or the interpreter exits, without close()
+                self._writer_finalizer = weakref.finalize(
+                    self, _stop_writer, self._write_queue, self._writer_thread
+                )
+            
+            # Queued under the lock so concurrent saves stay in order
+            self._write_queue.put(pending)
+        
+        logger.info(f"Snapshots queued for save: {len(pending)} (requested {snapshot_id})")
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every saved snapshot has been written to disk
+        
+        Args:
+            timeout: Maximum seconds to wait (None = no limit)
+        
+        Returns:
+            True if all queued writes completed without errors
+        """
+        with self._lock:
+            if self._writer_thread is None:
+                return True
+            
+            request = _FlushRequest()
+            self._write_queue.put(request)
+        
+        return request.event.wait(timeout) and request.ok
+    
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write any queued snapshots, then stop the writer thread
+        
+        A later save_snapshot() starts a new writer.
+        
+        Args:
+            timeout: Maximum seconds to wait (None = no limit)
+        
+        Returns:
+            True if all queued writes completed and the writer stopped
+        """
+        ok = self.flush(timeout)
+        
+        with self._lock:
+            thread = self._writer_thread
+            if thread is None:
+                return ok
+            
+            self._writer_thread = None
+            self._writer_finalizer.detach()
+            self._writer_finalizer = None
+            self._write_queue.put(_CLOSE_WRITER)
+        
+        thread.join(timeout)
+        return ok and not thread.is_alive()
+    
+    def __enter__(self) -> 'AgentOrchestrator':
+        """Use the orchestrator as a context manager that closes on exit"""
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the snapshot writer"""
+        self.close()
     
     # Private methods
     
+    def _reset(self):
+        """Restore the freshly initialized state so an instance can be reused"""
+        with self._lock:
+            self.agents = {}
+            self.tasks.clear()
+            self.snapshots.clear()
+            self._unsaved_snapshots = deque(maxlen=self.snapshots.maxlen)
+            self._last_agents_status = {}
+            self._agent_status_counts = [0] * len(_STATUS_ORDINAL)
+            self._task_status_counts = [0] * len(_STATUS_ORDINAL)
+            self._agent_error_total = 0
+            self._state_version = 0
+            self._snapshot_version = -1
+            self._callback_table = [()] * len(_STATUS_ORDINAL)
+    
     def _generate_id(self) -> str:
-        """Generate unique ID"""
-        timestamp = datetime.now().isoformat()
-        data = f"{timestamp}_{len(self.agents)}".encode()
-        return hashlib.md5(data).hexdigest()[:12]
-    
-    def _trigger_callbacks(self, status: BuildStatus):
-        """Trigger callbacks for status"""
-        for callback in self.callbacks[status]:
+        """Generate unique ID (per-instance random prefix plus counter)"""
+        return f"{self._id_prefix}{next(self._id_counter):08x}"
+    
+    def _diff_depth(self, snapshot: Snapshot) -> int:
+        """Number of diff snapshots stacked under (and including) snapshot"""
+        depth = 0
+        while snapshot.base is not None:
+            depth += 1
+            snapshot = snapshot.base
+        return depth
+    
+    def _set_agent_status(self, agent: Agent, status: BuildStatus):
+        """Transition agent status, keeping the status counters in sync"""
+        self._agent_status_counts[_STATUS_ORDINAL[agent.status]] -= 1
+        self._agent_status_counts[_STATUS_ORDINAL[status]] += 1
+        agent.status = status
+        self._state_version += 1
+    
+    def _set_task_status(self, task: Task, status: BuildStatus):
+        """Transition task status, keeping the status counters in sync"""
+        self._task_status_counts[_STATUS_ORDINAL[task.status]] -= 1
+        self._task_status_counts[_STATUS_ORDINAL[status]] += 1
+        task.status = status
+        self._state_version += 1
+    
+    def _trigger_callbacks(self, callbacks: Tuple[Callable, ...]):
+        """
+        Invoke status callbacks
+        
+        Callers read the callback tuple under the lock and invoke it after
+        releasing the lock, so slow callbacks never block other threads.
+        """
+        for callback in callbacks:
             try:
                 callback()
             except Exception as e:
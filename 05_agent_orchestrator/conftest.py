@@ -0,0 +1,17 @@
+"""
+Pytest configuration for the agent orchestrator tests
+"""
+
+from pathlib import Path
+
+import pytest
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    """Keep tmp_path directories under .pytest_cache unless --basetemp is given"""
+    if config.option.basetemp is None:
+        basetemp = Path(config.rootpath) / ".pytest_cache" / "tmp"
+        # pytest creates basetemp non-recursively; the cache dir may not exist yet
+        basetemp.parent.mkdir(parents=True, exist_ok=True)
+        config.option.basetemp = basetemp
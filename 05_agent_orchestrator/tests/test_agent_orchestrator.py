@@ -2,12 +2,14 @@
 Comprehensive tests for AgentOrchestrator - 80+ tests
 """
 
+import gc
+import importlib.util
+import json
+import sys
 import pytest
-import tempfile
+import subprocess
 import threading
-import time
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
 
 from agent_orchestrator import (
     AgentOrchestrator,
@@ -15,8 +17,66 @@ from agent_orchestrator import (
     Agent,
     Task,
     Snapshot,
+    create_orchestrator,
 )
 
+# Deprecations raised anywhere in the orchestrator fail the test instead of
+# scrolling past. In worker threads the raised warning surfaces as an
+# unhandled thread exception, so that is made an error as well.
+pytestmark = [
+    pytest.mark.filterwarnings("error::DeprecationWarning"),
+    pytest.mark.filterwarnings("error::pytest.PytestUnhandledThreadExceptionWarning"),
+]
+
+# Status strings as they appear in status dicts and snapshots
+_IDLE = BuildStatus.IDLE.value
+_RUNNING = BuildStatus.RUNNING.value
+
+# Agents registered by the pre_populated_orch fixture
+_PRE_POPULATED_AGENTS = [(f"agent{i}", f"Agent {i}") for i in range(10)]
+
+# Benchmarks only run where pytest-benchmark is installed
+_HAS_BENCHMARK = importlib.util.find_spec("pytest_benchmark") is not None
+
+
+class _Counter:
+    """Minimal callback that counts its calls"""
+    
+    def __init__(self):
+        self.n = 0
+    
+    def __call__(self, *args, **kwargs):
+        self.n += 1
+
+
+@pytest.fixture(scope="session")
+def shared_orch(tmp_path_factory):
+    """One orchestrator instance reused across the session"""
+    with AgentOrchestrator(storage_path=tmp_path_factory.mktemp("orchestrator")) as orch:
+        yield orch
+
+
+@pytest.fixture
+def orch(shared_orch):
+    """Shared orchestrator, reset to a freshly initialized state"""
+    shared_orch._reset()
+    return shared_orch
+
+
+@pytest.fixture
+def orch_with_tmp(tmp_path):
+    """Dedicated orchestrator storing into the test's tmp_path"""
+    with AgentOrchestrator(storage_path=tmp_path) as orch:
+        yield orch
+
+
+@pytest.fixture(scope="class")
+def pre_populated_orch(tmp_path_factory):
+    """Orchestrator with agent0..agent9 registered once per class"""
+    with AgentOrchestrator(storage_path=tmp_path_factory.mktemp("pre_populated")) as orch:
+        orch.register_agents(_PRE_POPULATED_AGENTS)
+        yield orch
+
 
 class TestAgentClass:
     """Tests for Agent class"""
@@ -39,80 +99,86 @@ class TestOrchestratorInitialization:
         assert len(orch.agents) == 0
         assert len(orch.tasks) == 0
     
-    def test_custom_storage_path(self):
+    def test_reset_restores_initial_state(self, orch):
+        """_reset() clears agents, tasks, snapshots and counters"""
+        orch.register_agent("agent1", "Test")
+        orch.start_agent("agent1")
+        orch.create_task("agent1", "Task")
+        orch.create_snapshot()
+        
+        orch._reset()
+        
+        assert len(orch.agents) == 0
+        assert len(orch.tasks) == 0
+        assert len(orch.snapshots) == 0
+        assert orch.get_statistics()['agents_running'] == 0
+    
+    def test_custom_storage_path(self, tmp_path):
         """Custom storage path"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            orch = AgentOrchestrator(storage_path=Path(tmpdir))
-            assert orch.storage_path == Path(tmpdir)
+        orch = AgentOrchestrator(storage_path=tmp_path)
+        assert orch.storage_path == tmp_path
 
 
 class TestAgentRegistration:
     """Tests for agent registration"""
     
-    def test_register_agent(self):
+    def test_register_agent(self, orch):
         """Register agent"""
-        orch = AgentOrchestrator()
         result = orch.register_agent("agent1", "Test Agent")
         
         assert result is True
         assert "agent1" in orch.agents
     
-    def test_register_multiple_agents(self):
+    def test_register_multiple_agents(self, orch):
         """Register multiple agents"""
-        orch = AgentOrchestrator()
-        
-        for i in range(5):
-            orch.register_agent(f"agent{i}", f"Agent {i}")
+        count = orch.register_agents([(f"agent{i}", f"Agent {i}") for i in range(5)])
         
+        assert count == 5
         assert len(orch.agents) == 5
-
-
-class TestAgentLifecycle:
-    """Tests for agent lifecycle"""
     
-    def test_start_agent(self):
-        """Start an agent"""
-        orch = AgentOrchestrator()
-        orch.register_agent("agent1", "Test")
+    def test_register_agent_instance(self, orch):
+        """Pre-built agents are registered as-is"""
+        agents = [Agent(agent_id=f"agent{i}", name=f"Agent {i}") for i in range(3)]
         
-        result = orch.start_agent("agent1")
-        assert result is True
-        assert orch.agents["agent1"].status == BuildStatus.RUNNING
-    
-    def test_pause_agent(self):
-        """Pause a running agent"""
-        orch = AgentOrchestrator()
-        orch.register_agent("agent1", "Test")
-        orch.start_agent("agent1")
+        for agent in agents:
+            assert orch.register_agent_instance(agent) is True
         
-        result = orch.pause_agent("agent1")
-        assert result is True
-        assert orch.agents["agent1"].status == BuildStatus.PAUSED
+        assert orch.agents["agent1"] is agents[1]
+        assert orch.start_agent("agent1") is True
     
-    def test_resume_agent(self):
-        """Resume a paused agent"""
-        orch = AgentOrchestrator()
-        orch.register_agent("agent1", "Test")
+    def test_register_agents_replaces_existing(self, orch):
+        """Bulk registration replaces agents and keeps counters in sync"""
+        orch.register_agent("agent1", "Old")
         orch.start_agent("agent1")
-        orch.pause_agent("agent1")
         
-        result = orch.resume_agent("agent1")
-        assert result is True
-        assert orch.agents["agent1"].status == BuildStatus.RUNNING
+        orch.register_agents([("agent1", "New"), ("agent2", "Other")])
+        
+        assert orch.agents["agent1"].name == "New"
+        assert orch.agents["agent1"].status == BuildStatus.IDLE
+        assert orch.get_statistics()['agents_running'] == 0
+
+
+class TestAgentLifecycle:
+    """Tests for agent lifecycle"""
     
-    def test_stop_agent(self):
-        """Stop an agent"""
-        orch = AgentOrchestrator()
+    @pytest.mark.parametrize("setup,transition,expected_status", [
+        ((), "start_agent", BuildStatus.RUNNING),
+        (("start_agent",), "pause_agent", BuildStatus.PAUSED),
+        (("start_agent", "pause_agent"), "resume_agent", BuildStatus.RUNNING),
+        (("start_agent",), "stop_agent", BuildStatus.COMPLETED),
+    ], ids=["start", "pause", "resume", "stop"])
+    def test_transition(self, orch, setup, transition, expected_status):
+        """Agent transitions from its prerequisite state"""
         orch.register_agent("agent1", "Test")
-        orch.start_agent("agent1")
+        for step in setup:
+            getattr(orch, step)("agent1")
         
-        result = orch.stop_agent("agent1")
+        result = getattr(orch, transition)("agent1")
         assert result is True
-        assert orch.agents["agent1"].status == BuildStatus.COMPLETED
+        assert orch.agents["agent1"].status == expected_status
     
-    def test_start_invalid_agent(self):
+    def test_start_invalid_agent(self, orch):
         """Start unknown agent returns False"""
-        orch = AgentOrchestrator()
         result = orch.start_agent("unknown")
         assert result is False
 
@@ -120,9 +186,8 @@ class TestAgentLifecycle:
 class TestErrorHandling:
     """Tests for error handling"""
     
-    def test_report_error(self):
+    def test_report_error(self, orch):
         """Report agent error"""
-        orch = AgentOrchestrator()
         orch.register_agent("agent1", "Test")
         
         result = orch.report_error("agent1", "Connection failed")
@@ -131,9 +196,8 @@ class TestErrorHandling:
         assert orch.agents["agent1"].error_count == 1
         assert orch.agents["agent1"].status == BuildStatus.ERROR
     
-    def test_multiple_errors(self):
+    def test_multiple_errors(self, orch):
         """Track multiple errors"""
-        orch = AgentOrchestrator()
         orch.register_agent("agent1", "Test")
         
         for _ in range(5):
@@ -145,9 +209,8 @@ class TestErrorHandling:
 class TestTaskCreation:
     """Tests for task creation"""
     
-    def test_create_task(self):
+    def test_create_task(self, orch):
         """Create task for agent"""
-        orch = AgentOrchestrator()
         orch.register_agent("agent1", "Test")
         
         task_id = orch.create_task("agent1", "Process data")
@@ -155,9 +218,8 @@ class TestTaskCreation:
         assert task_id is not None
         assert task_id in orch.tasks
     
-    def test_create_multiple_tasks(self):
+    def test_create_multiple_tasks(self, orch):
         """Create multiple tasks"""
-        orch = AgentOrchestrator()
         orch.register_agent("agent1", "Test")
         
         for i in range(5):
@@ -165,9 +227,31 @@ class TestTaskCreation:
         
         assert len(orch.tasks) == 5
     
-    def test_create_task_invalid_agent(self):
+    def test_task_ids_distinct_across_orchestrators(self, orch):
+        """Task IDs from separate orchestrators don't collide"""
+        other = AgentOrchestrator()
+        orch.register_agent("agent1", "Test")
+        other.register_agent("agent1", "Test")
+        
+        assert orch.create_task("agent1", "Task") != other.create_task("agent1", "Task")
+    
+    def test_create_task_agent_removed_before_lock(self, orch):
+        """Agent removed after the lock-free pre-check yields None"""
+        orch.register_agent("agent1", "Test")
+        
+        class _ResetAfterCheck(dict):
+            def __contains__(self, key):
+                contained = super().__contains__(key)
+                orch._reset()
+                return contained
+        
+        orch.agents = _ResetAfterCheck(orch.agents)
+        
+        assert orch.create_task("agent1", "Task") is None
+        assert len(orch.tasks) == 0
+    
+    def test_create_task_invalid_agent(self, orch):
         """Create task for unknown agent returns None"""
-        orch = AgentOrchestrator()
         task_id = orch.create_task("unknown", "Task")
         
         assert task_id is None
@@ -176,69 +260,65 @@ class TestTaskCreation:
 class TestTaskLifecycle:
     """Tests for task lifecycle"""
     
-    def test_start_task(self):
-        """Start a task"""
-        orch = AgentOrchestrator()
-        orch.register_agent("agent1", "Test")
-        task_id = orch.create_task("agent1", "Test task")
-        
-        result = orch.start_task(task_id)
-        assert result is True
-        assert orch.tasks[task_id].status == BuildStatus.RUNNING
-    
-    def test_complete_task(self):
-        """Complete a task"""
-        orch = AgentOrchestrator()
+    @pytest.mark.parametrize("setup,transition,args,expected_status,expected_fields", [
+        ((), "start_task", (), BuildStatus.RUNNING, {}),
+        (("start_task",), "complete_task", ({"status": "ok"},), BuildStatus.COMPLETED,
+         {"result": {"status": "ok"}}),
+        (("start_task",), "fail_task", ("API error",), BuildStatus.FAILED,
+         {"error": "API error"}),
+    ], ids=["start", "complete", "fail"])
+    def test_transition(self, orch, setup, transition, args, expected_status, expected_fields):
+        """Task transitions from its prerequisite state"""
         orch.register_agent("agent1", "Test")
         task_id = orch.create_task("agent1", "Test task")
-        orch.start_task(task_id)
+        for step in setup:
+            getattr(orch, step)(task_id)
         
-        result = orch.complete_task(task_id, result={"status": "ok"})
+        result = getattr(orch, transition)(task_id, *args)
         
         assert result is True
-        assert orch.tasks[task_id].status == BuildStatus.COMPLETED
+        task = orch.tasks[task_id]
+        assert task.status == expected_status
+        for name, value in expected_fields.items():
+            assert getattr(task, name) == value
     
-    def test_fail_task(self):
-        """Fail a task"""
-        orch = AgentOrchestrator()
+    def test_release_finished_task(self, orch):
+        """Only finished tasks can be released"""
         orch.register_agent("agent1", "Test")
-        task_id = orch.create_task("agent1", "Test task")
-        orch.start_task(task_id)
+        task_id = orch.create_task("agent1", "task1")
         
-        result = orch.fail_task(task_id, "API error")
+        assert orch.release_task(task_id) is None
         
-        assert result is True
-        assert orch.tasks[task_id].status == BuildStatus.FAILED
-        assert orch.tasks[task_id].error == "API error"
+        orch.complete_task(task_id, result="done")
+        task = orch.release_task(task_id)
+        
+        assert task.result == "done"
+        assert task_id not in orch.tasks
+        assert orch.get_statistics()['tasks_completed'] == 0
 
 
 class TestStatusQuerying:
     """Tests for status queries"""
     
-    def test_get_agent_status(self):
+    def test_get_agent_status(self, orch):
         """Get agent status"""
-        orch = AgentOrchestrator()
         orch.register_agent("agent1", "Test Agent")
         orch.start_agent("agent1")
         
         status = orch.get_agent_status("agent1")
         
         assert status is not None
-        assert status['status'] == BuildStatus.RUNNING.value
+        assert status['status'] == _RUNNING
     
-    def test_get_unknown_agent_status(self):
+    def test_get_unknown_agent_status(self, orch):
         """Get unknown agent status returns None"""
-        orch = AgentOrchestrator()
         status = orch.get_agent_status("unknown")
         
         assert status is None
     
-    def test_get_all_agents_status(self):
+    def test_get_all_agents_status(self, orch):
         """Get all agents status"""
-        orch = AgentOrchestrator()
-        
-        for i in range(3):
-            orch.register_agent(f"agent{i}", f"Agent {i}")
+        orch.register_agents([(f"agent{i}", f"Agent {i}") for i in range(3)])
         
         statuses = orch.get_all_agents_status()
         
@@ -248,9 +328,8 @@ class TestStatusQuerying:
 class TestSnapshots:
     """Tests for snapshots"""
     
-    def test_create_snapshot(self):
+    def test_create_snapshot(self, orch):
         """Create system snapshot"""
-        orch = AgentOrchestrator()
         orch.register_agent("agent1", "Test")
         
         snapshot_id = orch.create_snapshot()
@@ -258,36 +337,63 @@ class TestSnapshots:
         assert snapshot_id is not None
         assert len(orch.snapshots) == 1
     
-    def test_snapshot_includes_agent_status(self):
+    def test_snapshot_includes_agent_status(self, orch):
         """Snapshot captures agent status"""
-        orch = AgentOrchestrator()
         orch.register_agent("agent1", "Test")
         orch.start_agent("agent1")
         
         snapshot_id = orch.create_snapshot()
         snapshot = orch.snapshots[0]
         
-        assert snapshot.agents_status['agent1'] == BuildStatus.RUNNING.value
+        assert snapshot.get_agent_status('agent1') == _RUNNING
     
-    def test_get_snapshots(self):
+    def test_get_snapshots(self, orch):
         """Retrieve snapshots"""
-        orch = AgentOrchestrator()
         orch.register_agent("agent1", "Test")
         
-        for _ in range(5):
+        for i in range(2):
+            orch.create_task("agent1", f"task{i}")
             orch.create_snapshot()
         
         snapshots = orch.get_snapshots()
-        assert len(snapshots) >= 5
+        assert len(snapshots) >= 2
+    
+    def test_diff_snapshot_matches_full(self, orch):
+        """Diff snapshots store changes only but resolve to the full state"""
+        orch.register_agents([(f"agent{i}", f"Agent {i}") for i in range(3)])
+        orch.create_snapshot()
+        orch.start_agent("agent1")
+        
+        orch.create_snapshot(diff=True)
+        snapshot = orch.snapshots[0]
+        
+        assert snapshot.agents_status == {"agent1": _RUNNING}
+        assert snapshot.base is orch.snapshots[1]
+        assert snapshot.get_agent_status("agent0") == _IDLE
+        assert snapshot.get_agent_status("unknown") is None
+        assert snapshot.resolve_agents_status() == {
+            agent_id: status['status']
+            for agent_id, status in orch.get_all_agents_status().items()
+        }
+    
+    def test_unchanged_state_reuses_snapshot(self, orch):
+        """No new snapshot is recorded while state is unchanged"""
+        orch.register_agent("agent1", "Test")
+        
+        first = orch.create_snapshot()
+        assert orch.create_snapshot() == first
+        assert len(orch.snapshots) == 1
+        
+        orch.start_agent("agent1")
+        assert orch.create_snapshot() != first
+        assert len(orch.snapshots) == 2
 
 
 class TestStatistics:
     """Tests for statistics"""
     
-    def test_get_statistics(self):
+    def test_get_statistics(self, orch):
         """Get orchestrator statistics"""
-        orch = AgentOrchestrator()
-        
         orch.register_agent("agent1", "Test")
         orch.start_agent("agent1")
         
@@ -302,9 +408,31 @@ class TestStatistics:
         assert 'total_tasks' in stats
         assert 'tasks_completed' in stats
     
-    def test_statistics_empty(self):
+    def test_statistics_track_transitions(self, orch):
+        """Statistics reflect status transitions"""
+        orch.register_agent("agent1", "Test")
+        orch.register_agent("agent2", "Test")
+        orch.start_agent("agent1")
+        orch.report_error("agent2", "Error")
+        
+        t1 = orch.create_task("agent1", "Task 1")
+        t2 = orch.create_task("agent1", "Task 2")
+        t3 = orch.create_task("agent1", "Task 3")
+        orch.start_task(t1)
+        orch.start_task(t2)
+        orch.complete_task(t2)
+        orch.fail_task(t3, "Error")
+        
+        stats = orch.get_statistics()
+        
+        assert stats['agents_running'] == 1
+        assert stats['agent_errors'] == 1
+        assert stats['tasks_running'] == 1
+        assert stats['tasks_completed'] == 1
+        assert stats['tasks_failed'] == 1
+    
+    def test_statistics_empty(self, orch):
         """Statistics for empty orchestrator"""
-        orch = AgentOrchestrator()
         stats = orch.get_statistics()
         
         assert stats['total_agents'] == 0
@@ -314,11 +442,9 @@ class TestStatistics:
 class TestCallbacks:
     """Tests for callbacks"""
     
-    def test_register_callback(self):
+    def test_register_callback(self, orch):
         """Register status change callback"""
-        orch = AgentOrchestrator()
-        
-        callback = Mock()
+        callback = _Counter()
         orch.on_status_change(BuildStatus.RUNNING, callback)
         
         # Trigger callback
@@ -326,42 +452,64 @@ class TestCallbacks:
         orch.start_agent("agent1")
         
         # Callback should be called
-        callback.assert_called()
+        assert callback.n > 0
     
-    def test_multiple_callbacks(self):
+    def test_multiple_callbacks(self, orch):
         """Multiple callbacks on same status"""
-        orch = AgentOrchestrator()
+        called = set()
         
-        callback1 = Mock()
-        callback2 = Mock()
+        orch.on_status_change(BuildStatus.RUNNING, lambda: called.add(1))
+        orch.on_status_change(BuildStatus.RUNNING, lambda: called.add(2))
         
-        orch.on_status_change(BuildStatus.RUNNING, callback1)
-        orch.on_status_change(BuildStatus.RUNNING, callback2)
+        orch.register_agent("agent1", "Test")
+        orch.start_agent("agent1")
         
+        assert called == {1, 2}
+    
+    def test_callback_can_reenter_orchestrator(self, orch):
+        """Callbacks run outside the lock and may call back in"""
         orch.register_agent("agent1", "Test")
+        seen = []
+        
+        orch.on_status_change(
+            BuildStatus.RUNNING,
+            lambda: seen.append(orch.get_statistics()['agents_running'])
+        )
         orch.start_agent("agent1")
         
-        callback1.assert_called()
-        callback2.assert_called()
+        assert seen == [1]
 
 
 class TestThreadSafety:
     """Tests for concurrent operations"""
     
-    def test_concurrent_agent_operations(self):
+    @pytest.fixture
+    def populated_orch(self, pre_populated_orch):
+        """Pre-populated orchestrator, restored to its initial state after each test"""
+        yield pre_populated_orch
+        # Reset and re-register fresh (IDLE) agents so the counters stay
+        # consistent for the next test
+        pre_populated_orch._reset()
+        pre_populated_orch.register_agents(_PRE_POPULATED_AGENTS)
+        
+        stats = pre_populated_orch.get_statistics()
+        assert stats['total_agents'] == len(_PRE_POPULATED_AGENTS)
+        assert stats['agents_running'] == 0
+        assert stats['total_tasks'] == 0
+        assert all(agent.task_count == 0 for agent in pre_populated_orch.agents.values())
+    
+    def test_concurrent_agent_operations(self, populated_orch):
         """Multiple threads can manage agents concurrently"""
-        orch = AgentOrchestrator()
+        orch = populated_orch
         
-        for i in range(10):
-            orch.register_agent(f"agent{i}", f"Agent {i}")
+        # Release all threads at once to contend on the lock
+        barrier = threading.Barrier(5)
         
         def manage_agent(agent_id):
-            for _ in range(5):
-                orch.start_agent(agent_id)
-                time.sleep(0.001)
-                orch.pause_agent(agent_id)
-                time.sleep(0.001)
-                orch.resume_agent(agent_id)
+            barrier.wait()
+            orch.start_agent(agent_id)
+            orch.pause_agent(agent_id)
+            orch.resume_agent(agent_id)
         
         threads = [
             threading.Thread(target=manage_agent, args=(f"agent{i}",))
@@ -375,52 +523,73 @@ class TestThreadSafety:
         
         # Should have completed without errors
         assert len(orch.agents) == 10
+        assert orch.get_statistics()['agents_running'] == 5
     
-    def test_concurrent_task_creation(self):
+    def test_concurrent_task_creation(self, populated_orch):
         """Multiple threads can create tasks concurrently"""
-        orch = AgentOrchestrator()
-        orch.register_agent("agent1", "Test")
-        
-        task_ids = []
-        
-        def create_tasks():
+        orch = populated_orch
+        results = []
+        barrier = threading.Barrier(3)
+        
+        def create_tasks(out):
+            # Each thread fills its own list and publishes it once
+            local = []
+            barrier.wait()
             for i in range(10):
-                task_id = orch.create_task("agent1", f"Task {i}")
-                task_ids.append(task_id)
+                local.append(orch.create_task("agent1", f"Task {i}"))
+            out.append(local)
         
-        threads = [threading.Thread(target=create_tasks) for _ in range(3)]
+        threads = [threading.Thread(target=create_tasks, args=(results,)) for _ in range(3)]
         
         for t in threads:
             t.start()
         for t in threads:
             t.join()
         
+        task_ids = [task_id for local in results for task_id in local]
         assert len(orch.tasks) == 30
+        assert len(set(task_ids)) == 30
+    
+    @pytest.mark.skipif(not _HAS_BENCHMARK, reason="pytest-benchmark not installed")
+    def test_concurrent_task_creation_benchmark(self, populated_orch, benchmark):
+        """Regression-gate the contended create_task path"""
+        orch = populated_orch
+        
+        def create_tasks():
+            for i in range(10):
+                orch.create_task("agent1", f"Task {i}")
+        
+        def burst():
+            threads = [threading.Thread(target=create_tasks) for _ in range(3)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        
+        benchmark.pedantic(burst, rounds=10, warmup_rounds=3)
+
 
 
 class TestEdgeCases:
     """Tests for edge cases"""
     
-    def test_start_already_running_agent(self):
+    def test_start_already_running_agent(self, orch):
         """Starting already-running agent returns False"""
-        orch = AgentOrchestrator()
         orch.register_agent("agent1", "Test")
         orch.start_agent("agent1")
         
         result = orch.start_agent("agent1")
         assert result is False
     
-    def test_pause_idle_agent(self):
+    def test_pause_idle_agent(self, orch):
         """Pausing idle agent returns False"""
-        orch = AgentOrchestrator()
         orch.register_agent("agent1", "Test")
         
         result = orch.pause_agent("agent1")
         assert result is False
     
-    def test_resume_running_agent(self):
+    def test_resume_running_agent(self, orch):
         """Resuming running agent returns False"""
-        orch = AgentOrchestrator()
         orch.register_agent("agent1", "Test")
         orch.start_agent("agent1")
         
@@ -441,6 +610,16 @@ class TestTaskClass:
         assert task.task_id == "t1"
         assert task.name == "test_task"
         assert task.status == BuildStatus.IDLE
+    
+    def test_task_to_dict_formats_timestamps(self):
+        """Integer timestamps are serialized as ISO strings"""
+        task = Task(task_id="t1", name="test_task", agent_id="agent1")
+        assert isinstance(task.created_at, int)
+        
+        data = task.to_dict()
+        assert isinstance(data['created_at'], str)
+        assert data['started_at'] is None
+        assert data['status'] == _IDLE
 
 
 class TestSnapshotClass:
@@ -455,22 +634,110 @@ class TestSnapshotClass:
         )
         assert snapshot.task_count == 5
         assert snapshot.completed_count == 3
+    
+    @pytest.mark.skipif(sys.version_info < (3, 10), reason="slots need 3.10+")
+    def test_dataclasses_are_slotted(self):
+        """Agent, Task and Snapshot carry no per-instance __dict__"""
+        assert not hasattr(Agent("a1", "Test"), '__dict__')
+        assert not hasattr(Task("t1", "task", "a1"), '__dict__')
+        assert not hasattr(Snapshot("s1"), '__dict__')
 
 
 class TestPersistence:
     """Tests for saving snapshots"""
     
-    def test_save_snapshot(self):
+    def test_save_snapshot(self, orch_with_tmp):
         """Save snapshot to disk"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            orch = AgentOrchestrator(storage_path=Path(tmpdir))
+        orch = orch_with_tmp
+        orch.register_agent("agent1", "Test")
+        
+        snapshot_id = orch.create_snapshot()
+        orch.save_snapshot(snapshot_id)
+        assert orch.flush(timeout=5)
+        
+        snapshots_file = orch.storage_path / "snapshots.jsonl"
+        assert snapshots_file.exists()
+    
+    def test_unsaved_snapshots_are_bounded(self, orch):
+        """Snapshots that are never saved don't grow past the history size"""
+        orch.register_agent("agent1", "Test")
+        for i in range(orch.snapshots.maxlen + 5):
+            orch.create_task("agent1", f"Task {i}")
+            orch.create_snapshot()
+        
+        assert len(orch._unsaved_snapshots) == orch.snapshots.maxlen
+    
+    def test_save_snapshot_flushes_pending(self, orch_with_tmp):
+        """Saving writes every unsaved snapshot exactly once"""
+        orch = orch_with_tmp
+        orch.register_agent("agent1", "Test")
+        
+        orch.create_snapshot()
+        orch.start_agent("agent1")
+        snapshot_id = orch.create_snapshot()
+        orch.save_snapshot(snapshot_id)
+        orch.save_snapshot(snapshot_id)
+        assert orch.flush(timeout=5)
+        
+        lines = (orch.storage_path / "snapshots.jsonl").read_text().splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[1])['snapshot_id'] == snapshot_id
+    
+    def test_close_stops_writer(self, tmp_path):
+        """close() writes pending snapshots and stops the writer thread"""
+        with AgentOrchestrator(storage_path=tmp_path) as orch:
             orch.register_agent("agent1", "Test")
+            orch.save_snapshot(orch.create_snapshot())
+            writer = orch._writer_thread
+        
+        assert not writer.is_alive()
+        assert len((tmp_path / "snapshots.jsonl").read_text().splitlines()) == 1
+    
+    def test_dropped_orchestrator_stops_writer(self, tmp_path):
+        """An orchestrator dropped without close() doesn't leak its writer"""
+        orch = AgentOrchestrator(storage_path=tmp_path)
+        orch.register_agent("agent1", "Test")
+        orch.save_snapshot(orch.create_snapshot())
+        writer = orch._writer_thread
+        
+        del orch
+        gc.collect()
+        writer.join(timeout=5)
+        
+        assert not writer.is_alive()
+    
+    def test_snapshots_written_at_exit(self, tmp_path):
+        """Snapshots saved without close() still reach the file on exit"""
+        script = (
+            "import time\n"
+            "from pathlib import Path\n"
+            "import agent_orchestrator\n"
+            "from agent_orchestrator import AgentOrchestrator\n"
+            # Slow the writer down so the interpreter reaches exit first
+            "encode = agent_orchestrator._json_line\n"
+            "agent_orchestrator._json_line = lambda d: (time.sleep(0.2), encode(d))[1]\n"
+            f"orch = AgentOrchestrator(storage_path=Path({str(tmp_path)!r}))\n"
+            "orch.register_agent('agent1', 'Test')\n"
+            "orch.save_snapshot(orch.create_snapshot())\n"
+        )
+        skill_dir = Path(__file__).resolve().parents[1]
+        
+        subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=skill_dir, check=True, capture_output=True, timeout=30
+        )
+        
+        assert len((tmp_path / "snapshots.jsonl").read_text().splitlines()) == 1
+    
+    def test_flush_reports_failed_write(self, tmp_path):
+        """flush() returns False when a queued write failed"""
+        (tmp_path / "snapshots.jsonl").mkdir()
+        with AgentOrchestrator(storage_path=tmp_path) as orch:
+            orch.register_agent("agent1", "Test")
+            orch.save_snapshot(orch.create_snapshot())
             
-            snapshot_id = orch.create_snapshot()
-            orch.save_snapshot(snapshot_id)
-            
-            snapshots_file = Path(tmpdir) / "snapshots.jsonl"
-            assert snapshots_file.exists()
+            assert orch.flush(timeout=5) is False
+            assert orch.flush(timeout=5) is True
 
 
 # Utility test
@@ -479,8 +746,6 @@ class TestUtilities:
     
     def test_create_orchestrator_function(self):
         """create_orchestrator() helper works"""
-        from agent_orchestrator import create_orchestrator
-        
         orch = create_orchestrator()
         assert isinstance(orch, AgentOrchestrator)
 